@@ -0,0 +1 @@
+# Benchmarks dos conversores (rodar com: python -m benchmarks.<modulo>)
@@ -0,0 +1,60 @@
+"""Compara os leitores de XLSX do ONErpm com o caminho original
+(pd.read_excel com openpyxl, todas as colunas).
+
+    python -m benchmarks.bench_readers                   # planilha sintética
+    python -m benchmarks.bench_readers --rows 200000
+    python -m benchmarks.bench_readers arquivo.xlsx
+"""
+import argparse
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.generators import onerpm_workbook
+from conversor.onerpm import SOURCE_COLUMNS
+from conversor.readers import available_engines, read_sheet
+
+
+def timed(func, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file', nargs='?', help='Workbook ONErpm (padrão: sintético)')
+    parser.add_argument('--sheet', default='Sales')
+    parser.add_argument('--rows', type=int, default=50_000, help='Linhas da planilha sintética')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'rb') as f:
+            data = f.read()
+    else:
+        data = onerpm_workbook(args.rows)
+
+    baseline, df = timed(
+        lambda: pd.read_excel(BytesIO(data), sheet_name=args.sheet, engine='openpyxl'),
+        args.repeat
+    )
+    print(f"{'read_excel (original)':<24} {baseline:8.3f}s  {len(df):>9} linhas  "
+          f"{df.memory_usage(deep=True).sum() / 1024 / 1024:8.1f} MB")
+
+    for engine in available_engines():
+        elapsed, df = timed(
+            lambda: read_sheet(data, args.sheet, usecols=SOURCE_COLUMNS, engine=engine),
+            args.repeat
+        )
+        print(f"{engine:<24} {elapsed:8.3f}s  {len(df):>9} linhas  "
+              f"{df.memory_usage(deep=True).sum() / 1024 / 1024:8.1f} MB  "
+              f"({baseline / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Geradores de statements sintéticos para os benchmarks.
+
+Cada gerador devolve os bytes do arquivo, no mesmo formato que chega
+pelo upload (CSV FUGA, CSV Altafonte ';'/latin1, workbook ONErpm e
+workbook Backoffice "ST").
+"""
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from conversor.backoffice import MUMA_MAPPING
+
+SEED = 0
+TERRITORIES = ['BR', 'US', 'PT', 'MX', 'AR', 'ES', 'FR', 'DE', 'JP', 'GB']
+STORES = ['Spotify', 'Deezer', 'YouTube', 'Apple Music', 'Amazon', 'TikTok']
+ARTISTS = [f'Artista {i}' for i in range(50)]
+TITLES = [f'Faixa {i}' for i in range(500)]
+
+
+def _months(rng, rows, start='2024-01-01', periods=12):
+    months = pd.date_range(start, periods=periods, freq='MS')
+    return months[rng.integers(0, periods, rows)]
+
+
+def _isrc(rng, rows):
+    return pd.Series(rng.integers(0, 100_000, rows)).map('BRXXX24{:05d}'.format)
+
+
+def fuga_csv(rows: int, label_share: float = 0.6) -> bytes:
+    rng = np.random.default_rng(SEED)
+    labels = np.where(
+        rng.random(rows) < label_share,
+        rng.choice(['Elemess', 'Elemess Label Services'], rows),
+        rng.choice(['Outro Selo', 'Terceiros'], rows)
+    )
+    start = _months(rng, rows)
+    df = pd.DataFrame({
+        'Sale Start Date': start.strftime('%Y-%m-%d'),
+        'Sale End Date': (start + pd.offsets.MonthEnd(0)).strftime('%Y-%m-%d'),
+        'DSP': rng.choice(STORES, rows),
+        'Sale Store Name': rng.choice(STORES, rows),
+        'Sale Type': rng.choice(['Stream', 'Download'], rows),
+        'Sale User Type': rng.choice(['Free', 'Premium'], rows),
+        'Territory': rng.choice(TERRITORIES, rows),
+        'Product UPC': rng.integers(10**11, 10**12, rows),
+        'Product Reference': rng.integers(0, 10**6, rows),
+        'Product Label': labels,
+        'Product Artist': rng.choice(ARTISTS, rows),
+        'Product Title': rng.choice(TITLES, rows),
+        'Asset Artist': rng.choice(ARTISTS, rows),
+        'Asset Title': rng.choice(TITLES, rows),
+        'Asset ISRC': _isrc(rng, rows),
+        'Sale Units': rng.integers(1, 5000, rows),
+        'Original Gross Income': rng.random(rows) * 10,
+        'Original Currency': 'USD',
+        'Exchange Rate': 1.0,
+        'Converted Gross Income': rng.random(rows) * 10,
+        'Reported Royalty': rng.random(rows) * 5,
+        'Currency': 'USD',
+    })
+    return df.to_csv(index=False).encode('utf-8')
+
+
+def altafonte_csv(rows: int, label_share: float = 0.6) -> bytes:
+    rng = np.random.default_rng(SEED)
+    df = pd.DataFrame({
+        'PERIODO': _months(rng, rows).strftime('%Y%m'),
+        'TIENDA': rng.choice(STORES, rows),
+        'PAIS': rng.choice(TERRITORIES, rows),
+        'SELLO': np.where(rng.random(rows) < label_share, 'Elemess', 'Otro Sello'),
+        'EAN': pd.Series(rng.integers(10**12, 10**13, rows)).map('="{}"'.format),
+        'ISRC': _isrc(rng, rows),
+        'ARTISTA': rng.choice(ARTISTS, rows),
+        'TITULO': rng.choice(TITLES, rows),
+        'CANTIDAD': rng.integers(1, 5000, rows),
+        'BRUTO': rng.random(rows) * 2000,
+        'NET': rng.random(rows) * 1500,
+        'CPM': rng.random(rows),
+    })
+    return df.to_csv(index=False, sep=';', decimal=',', encoding='latin1').encode('latin1')
+
+
+def onerpm_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(SEED)
+    return pd.DataFrame({
+        'Transaction Month': _months(rng, rows),
+        'Accounted Date': _months(rng, rows),
+        'Territory': rng.choice(TERRITORIES, rows),
+        'Parent ID': rng.integers(10**11, 10**12, rows).astype(str),
+        'ID': _isrc(rng, rows),
+        'Title': rng.choice(TITLES, rows),
+        'Gross': rng.random(rows),
+        'Net': rng.random(rows),
+        'Currency': 'USD',
+        'Quantity': rng.integers(1, 1000, rows),
+        'Sales Type': rng.choice(['Stream', 'Download'], rows),
+        'Artists': rng.choice(ARTISTS, rows),
+        'Album/Channel': rng.choice(TITLES, rows),
+        'Store': rng.choice(STORES, rows),
+        'Label': 'Elemess',
+        'Share Type': rng.choice(['Share In', 'Share Out'], rows),
+        'Fee': rng.random(rows),
+        'Exchange Rate': 5.0,
+        'Notes': '',
+        'Channel ID': rng.integers(0, 100, rows),
+    })
+
+
+def onerpm_workbook(rows: int) -> bytes:
+    df = onerpm_frame(rows)
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        df.to_excel(writer, sheet_name='Sales', index=False)
+        df.to_excel(writer, sheet_name='Shares In & Out', index=False)
+    return buffer.getvalue()
+
+
+def backoffice_frame(rows: int, seed: int = SEED) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start = _months(rng, rows)
+    data = {column: rng.choice([f'{column} {i}' for i in range(20)], rows) for column in MUMA_MAPPING}
+    data.update({
+        'BO_PayeesID': rng.integers(1000, 1100, rows),
+        'Payee_Name': rng.choice(ARTISTS, rows),
+        'Country_Of_Sale': rng.choice(TERRITORIES, rows),
+        'StartDate': start.strftime('%d/%m/%Y'),
+        'EndDate': (start + pd.offsets.MonthEnd(0)).strftime('%d/%m/%Y'),
+        'Song_Title': rng.choice(TITLES, rows),
+        'Performer': rng.choice(ARTISTS, rows),
+        'Customer': rng.choice(STORES, rows),
+        'ISRC': _isrc(rng, rows),
+        'Currency': 'BRL',
+        'Total_Units': rng.integers(1, 5000, rows),
+        'ROYATIES_GROSS_$': rng.random(rows) * 10,
+        'ADMIN_FEE_$': rng.random(rows),
+        'ROYALTIES_TO_BE_PAID': rng.random(rows) * 9,
+    })
+    return pd.DataFrame(data, columns=list(MUMA_MAPPING))
+
+
+def backoffice_workbook(rows: int, seed: int = SEED) -> bytes:
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        backoffice_frame(rows, seed).to_excel(writer, index=False)
+    return buffer.getvalue()
@@ -0,0 +1,195 @@
+"""Benchmark por etapa dos conversores com statements sintéticos.
+
+Roda os conversores de ponta a ponta (leitura, preparo, imposto,
+serialização) sob instrumentation.recording() e lê as etapas que os
+próprios processadores registram: parse, filter, template, summary, tax,
+format, totals, serialize... Duas passadas separadas: uma só de tempo e
+outra de pico de memória (tracemalloc), para que o custo do tracemalloc
+não entre nos tempos. Na passada de memória a leitura Backoffice roda num
+único processo, senão as alocações dos processos do pool não seriam
+vistas. O resultado é gravado em JSON para comparar execuções ao longo
+do tempo.
+
+    python -m benchmarks.run --rows 100000
+    python -m benchmarks.run --rows 100000 --only fuga altafonte
+    python -m benchmarks.run --compare benchmarks/results/anterior.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime
+from io import BytesIO, StringIO
+
+import pandas as pd
+
+from benchmarks import generators
+from conversor import altafonte, backoffice, fuga, onerpm
+from conversor.ingest import read_workbooks
+from conversor.instrumentation import StageLog, recording
+from conversor.rasa import write_csv, write_rasa_csv
+from conversor.totals import compute_totals
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+class _PeakLog(StageLog):
+    # Passada de memória: cada etapa registrada leva o pico do tracemalloc
+    # desde o fim da etapa anterior (as etapas destes fluxos não se aninham)
+
+    def __init__(self):
+        super().__init__()
+        self.peaks = []
+
+    def append(self, record):
+        self.peaks.append(tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+        tracemalloc.reset_peak()
+        super().append(record)
+
+
+def _seconds(records):
+    # Etapas repetidas numa execução (ex.: dois 'serialize') são somadas
+    results = {}
+    for record in records:
+        current = results.setdefault(record.stage, {'seconds': 0.0, 'rows': record.rows})
+        current['seconds'] = round(current['seconds'] + record.seconds, 6)
+    return results
+
+
+def _peaks(log):
+    # Etapas repetidas: o maior pico entre elas
+    results = {}
+    for record, peak in zip(log.snapshot(), log.peaks):
+        results[record.stage] = round(max(results.get(record.stage, 0.0), peak), 3)
+    return results
+
+
+def fuga_run(data, workers=None):
+    df = fuga.read_fuga(data)
+    result = fuga.prepare_fuga(df).result(fuga.FUGA_TAX_RATE)
+    write_csv(result.df)
+    # Modo streaming: leitura, filtro, imposto e gravação numa etapa só
+    fuga.process_fuga_chunked(BytesIO(data), fuga.FUGA_TAX_RATE, StringIO(), preview_rows=0)
+
+
+def altafonte_run(data, workers=None):
+    df = altafonte.read_altafonte(data)
+    result = altafonte.prepare_altafonte(df).result(altafonte.ALTAFONTE_TAX_RATE)
+    write_csv(result.df)
+
+
+def onerpm_run(data, workers=None):
+    processor = onerpm.StatementProcessor()
+    df = processor.read(data, onerpm.SHARES_SHEET)
+    result = processor.prepare_onerpm_sharein(df).result(onerpm.ONERPM_TAX_RATE)
+    write_rasa_csv(result.df, service_name=onerpm.RASA_SERVICE_NAME)
+
+
+def backoffice_workbooks(rows, files=4):
+    per_file = max(rows // files, 1)
+    return [
+        (f'BO_ST_{i}.xlsx', generators.backoffice_workbook(per_file, seed=i))
+        for i in range(files)
+    ]
+
+
+def backoffice_run(workbooks, workers=None):
+    dataframes = [result.df for result in read_workbooks(workbooks, max_workers=workers)]
+    dataframes, _ = backoffice.align_workbooks(dataframes, [name for name, _ in workbooks])
+    # Totais direto dos bytes das planilhas, como na página
+    compute_totals(workbooks, max_workers=workers)
+    backoffice.write_xlsx(backoffice.iter_muma(dataframes), BytesIO())
+
+
+# nome -> (gerador dos dados, conversor de ponta a ponta)
+BENCHMARKS = {
+    'fuga': (generators.fuga_csv, fuga_run),
+    'altafonte': (generators.altafonte_csv, altafonte_run),
+    'onerpm': (generators.onerpm_workbook, onerpm_run),
+    'backoffice': (backoffice_workbooks, backoffice_run),
+}
+
+
+def run_benchmark(name, rows):
+    generate, run = BENCHMARKS[name]
+    data = generate(rows)
+
+    log = StageLog()
+    with recording(log, name):
+        run(data)
+    results = _seconds(log.snapshot())
+
+    # Segunda passada só para a memória, num único processo
+    peak_log = _PeakLog()
+    tracemalloc.start()
+    try:
+        with recording(peak_log, name):
+            run(data, workers=1)
+    finally:
+        tracemalloc.stop()
+    peaks = _peaks(peak_log)
+
+    for stage, values in results.items():
+        values['peak_mb'] = peaks.get(stage)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current, previous):
+    lines = []
+    for name, stages in current['results'].items():
+        for stage, values in stages.items():
+            before = previous.get('results', {}).get(name, {}).get(stage)
+            if not before or not before['seconds']:
+                continue
+            ratio = values['seconds'] / before['seconds']
+            lines.append(f"{name:<11} {stage:<14} {before['seconds']:9.3f}s -> {values['seconds']:9.3f}s  ({ratio:.2f}x)")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--output', help='Arquivo JSON (padrão: benchmarks/results/<data>.json)')
+    parser.add_argument('--compare', help='JSON de uma execução anterior para comparar')
+    args = parser.parse_args()
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'rows': args.rows,
+        'results': {},
+    }
+    for name in args.only:
+        report['results'][name] = run_benchmark(name, args.rows)
+        for stage, values in report['results'][name].items():
+            print(f"{name:<11} {stage:<14} {values['seconds']:9.3f}s  {values['peak_mb'] or 0:9.1f} MB")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now().strftime('%Y%m%d_%H%M%S') + '.json'
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f'Resultados gravados em {output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(report, json.load(f)))
+
+
+if __name__ == '__main__':
+    main()
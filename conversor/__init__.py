@@ -0,0 +1 @@
+# Núcleo compartilhado pelos conversores (sem dependência de Streamlit)
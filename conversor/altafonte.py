@@ -0,0 +1,82 @@
+from typing import Any, Dict, Iterable, Optional
+
+import pandas as pd
+
+from conversor.filters import LabelFilter
+from conversor.formatting import format_number_br
+from conversor.instrumentation import stage
+from conversor.sniff import CsvDialect, read_csv, sniff
+from conversor.result import ConversionResult, PreparedStatement
+from conversor.summary import summarize
+
+ALTAFONTE_LABELS = ['Elemess']
+ALTAFONTE_TAX_RATE = 28.5
+NUMBER_COLUMNS = ['BRUTO', 'NET', 'CPM']
+ROYALTY_COLUMN = 'NET'
+
+# Formato de exportação padrão; o real é detectado pelo começo do arquivo
+ALTAFONTE_DIALECT = CsvDialect(encoding='latin1', sep=';', decimal=',', thousands='.')
+REQUIRED_COLUMNS = ['SELLO', 'EAN', ROYALTY_COLUMN]
+
+# Colunas usadas no resumo pré-agregado
+ALTAFONTE_DIMENSIONS = {
+    'label': 'SELLO',
+    'territory': 'PAIS',
+    'store': 'TIENDA',
+    'month': 'PERIODO',
+}
+
+LABEL_FILTER = LabelFilter('SELLO', tuple(ALTAFONTE_LABELS))
+
+
+def clean_ean(ean):
+    # Remove Excel formula formatting
+    return ean.strip('=()""')
+
+
+def read_altafonte(file: Any, dialect: Optional[CsvDialect] = None) -> pd.DataFrame:
+    dialect = dialect or sniff(file, ALTAFONTE_DIALECT)
+    with stage('parse') as current:
+        df = read_csv(file, dialect, REQUIRED_COLUMNS)
+        current.rows = len(df)
+    return df
+
+
+def format_numbers(df: pd.DataFrame) -> pd.DataFrame:
+    with stage('format', rows=len(df)):
+        for col in NUMBER_COLUMNS:
+            df[col] = format_number_br(df[col], decimals=6)
+    return df
+
+
+def _prepare(filtered_df: pd.DataFrame) -> PreparedStatement:
+    filtered_df = filtered_df.copy()
+    filtered_df['EAN'] = filtered_df['EAN'].apply(clean_ean)
+
+    with stage('summary', rows=len(filtered_df)):
+        summary = summarize(filtered_df, ROYALTY_COLUMN, ALTAFONTE_DIMENSIONS)
+
+    return PreparedStatement(filtered_df, ROYALTY_COLUMN, summary, finalize=format_numbers)
+
+
+def prepare_altafonte(df: pd.DataFrame, labels: Optional[Iterable[str]] = None,
+                      key: Optional[str] = None) -> PreparedStatement:
+    # key: chave do conteúdo do arquivo, para reaproveitar o índice do filtro
+    with stage('filter') as current:
+        filtered_df = LABEL_FILTER.with_values(labels).apply(df, key)
+        current.rows = len(filtered_df)
+    return _prepare(filtered_df)
+
+
+def prepare_altafonte_by_label(df: pd.DataFrame, labels: Optional[Iterable[str]] = None,
+                               key: Optional[str] = None) -> Dict[str, PreparedStatement]:
+    # Um resultado por selo, todos tirados do mesmo índice
+    with stage('filter') as current:
+        parts = LABEL_FILTER.split(df, {label: [label] for label in labels or ALTAFONTE_LABELS}, key)
+        current.rows = sum(len(part) for part in parts.values())
+    return {label: _prepare(part) for label, part in parts.items()}
+
+
+def process_altafonte(df: pd.DataFrame, tax_rate: float,
+                      labels: Optional[Iterable[str]] = None) -> ConversionResult:
+    return prepare_altafonte(df, labels).result(tax_rate)
@@ -0,0 +1,205 @@
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from conversor.dates import format_dates
+from conversor.instrumentation import stage
+from conversor.xlsx import write_xlsx_streaming
+
+ROYALTIES_COLUMN = 'ROYALTIES_TO_BE_PAID'
+TOTALS_COLUMN = 'Soma de ROYALTIES_TO_BE_PAID'
+
+# Column mapping dictionary
+MUMA_MAPPING = {
+    'BO_PayeesID': 'Member Reference',
+    'Payee_Name': 'Member Name',
+    'Publisher': 'PUBLISHER',
+    'Country_Of_Sale': 'Territory',
+    'StartDate': 'Date From (MM/YYYY)',
+    'EndDate': 'Date To (MM/YYYY)',
+    'BO_SongCode': 'BO_SONGCODE',
+    'Publishers_SongCode': 'PUBLISHERS_SONGCODE',
+    'Song_Title': 'Song Title',
+    'Song_Owners': 'Song Composer(s)',
+    'Performer': 'Artist',
+    'Customer': 'CUSTOMER',
+    'ISWC': 'ISWC',
+    'ISRC': 'ISRC',
+    'Currency': 'CURRENCY',
+    'Format': 'Instrumental or Vocal Use',
+    'Total_Units': 'Units',
+    'ROYATIES_GROSS_$': 'ROYATIES_GROSS_$',
+    'ADMIN_FEE_$': 'ADMIN_FEE_$',
+    'ROYALTIES_TO_BE_PAID': 'Amount',
+    'Source': 'Source of Income',
+    'Statement_Period_#': 'STATEMENT_PERIOD_#',
+    'Statement_Period': 'STATEMENT_PERIOD',
+    'Payee_Statement_#': 'PAYEE_STATEMENT_#'
+}
+
+# Esquema declarado dos arquivos Backoffice: as colunas do mapping, nessa ordem
+BACKOFFICE_COLUMNS = list(MUMA_MAPPING)
+
+NUMERIC_COLUMNS = ['Total_Units', 'ROYATIES_GROSS_$', 'ADMIN_FEE_$', 'ROYALTIES_TO_BE_PAID']
+
+# Texto com poucos valores distintos: vira categoria no concatenado
+CATEGORY_COLUMNS = [
+    'BO_PayeesID', 'Payee_Name', 'Publisher', 'Country_Of_Sale', 'Customer', 'Currency',
+    'Format', 'Source', 'Statement_Period_#', 'Statement_Period'
+]
+
+# Só vira categoria se os valores distintos forem no máximo essa fração das linhas
+CATEGORY_MAX_RATIO = 0.5
+
+
+@dataclass
+class SchemaDrift:
+    name: str
+    missing: List[str] = field(default_factory=list)
+    extra: List[str] = field(default_factory=list)
+    not_numeric: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing or self.extra or self.not_numeric)
+
+    def describe(self) -> str:
+        parts = []
+        if self.missing:
+            parts.append(f"faltando: {', '.join(map(str, self.missing))}")
+        if self.extra:
+            parts.append(f"a mais: {', '.join(map(str, self.extra))}")
+        if self.not_numeric:
+            parts.append(f"não numéricas: {', '.join(map(str, self.not_numeric))}")
+        return '; '.join(parts) or 'conforme o esquema'
+
+
+def is_statement_file(name: str) -> bool:
+    # Só os arquivos "ST" entram na totalização
+    return "ST" in name.upper()
+
+
+def royalties_total(df: pd.DataFrame) -> Optional[float]:
+    if ROYALTIES_COLUMN not in df.columns:
+        return None
+    return df[ROYALTIES_COLUMN].sum()
+
+
+def totals_table(results: List[Tuple[str, float]]) -> pd.DataFrame:
+    df_results = pd.DataFrame(results, columns=["Arquivo", TOTALS_COLUMN])
+
+    # Arredonda os valores para duas casas decimais
+    df_results[TOTALS_COLUMN] = df_results[TOTALS_COLUMN].round(2)
+
+    # Adiciona uma linha com a soma total
+    total_royalties_sum = df_results[TOTALS_COLUMN].sum().round(2)
+    df_results.loc[len(df_results.index)] = ["Total", total_royalties_sum]
+
+    return df_results
+
+
+def concat_workbooks(dataframes: List[pd.DataFrame]) -> pd.DataFrame:
+    with stage('concat') as current:
+        df = pd.concat(dataframes, ignore_index=True)
+        current.rows = len(df)
+    return df
+
+
+def schema_columns(dataframes: List[pd.DataFrame]) -> List[str]:
+    # Colunas do esquema presentes em algum arquivo, na ordem do esquema,
+    # seguidas das colunas fora do esquema na ordem em que aparecem
+    present = set(union_columns(dataframes))
+    declared = [column for column in BACKOFFICE_COLUMNS if column in present]
+    return declared + [column for column in union_columns(dataframes) if column not in MUMA_MAPPING]
+
+
+def _numeric(df: pd.DataFrame, drift: SchemaDrift) -> pd.DataFrame:
+    for column in NUMERIC_COLUMNS:
+        if column not in df.columns:
+            continue
+        values = pd.to_numeric(df[column], errors='coerce')
+        # Não descarta valores: se algum não for número, a coluna fica como veio
+        if values.notna().sum() == df[column].notna().sum():
+            df[column] = values.astype('float64')
+        else:
+            drift.not_numeric.append(column)
+    return df
+
+
+def _category_dtypes(dataframes: List[pd.DataFrame]) -> dict:
+    # Um único CategoricalDtype por coluna, com as categorias de todos os
+    # arquivos: assim o pd.concat mantém a coluna como categoria
+    rows = sum(len(df) for df in dataframes)
+    dtypes = {}
+    for column in CATEGORY_COLUMNS:
+        uniques = [pd.Index(df[column].dropna().unique()) for df in dataframes if column in df.columns]
+        if not uniques:
+            continue
+        categories = uniques[0].append(uniques[1:]).unique()
+        if len(categories) <= CATEGORY_MAX_RATIO * rows:
+            dtypes[column] = pd.CategoricalDtype(categories)
+    return dtypes
+
+
+def align_workbooks(dataframes: List[pd.DataFrame],
+                    names: Optional[List[str]] = None) -> Tuple[List[pd.DataFrame], List[SchemaDrift]]:
+    # Alinha cada arquivo ao esquema declarado antes de concatenar: mesmas
+    # colunas, numéricos como float64 e texto repetitivo como categoria.
+    # Devolve também as diferenças de esquema de cada arquivo.
+    names = names or [f'Arquivo {i + 1}' for i in range(len(dataframes))]
+    with stage('align') as current:
+        columns = schema_columns(dataframes)
+        drifts = []
+        aligned = []
+        for name, df in zip(names, dataframes):
+            drift = SchemaDrift(
+                name,
+                missing=[column for column in BACKOFFICE_COLUMNS if column not in df.columns],
+                extra=[column for column in df.columns if column not in MUMA_MAPPING]
+            )
+            aligned.append(_numeric(df.reindex(columns=columns), drift))
+            drifts.append(drift)
+
+        dtypes = _category_dtypes(aligned)
+        aligned = [df.astype(dtypes) for df in aligned]
+        current.rows = sum(len(df) for df in aligned)
+    return aligned, drifts
+
+
+def drift_table(drifts: List[SchemaDrift]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [(drift.name, drift.describe()) for drift in drifts if not drift.ok],
+        columns=['Arquivo', 'Diferenças de esquema']
+    )
+
+
+def union_columns(dataframes: List[pd.DataFrame]) -> List[str]:
+    # Mesmas colunas, na mesma ordem, que o pd.concat produziria
+    return list(dict.fromkeys(column for df in dataframes for column in df.columns))
+
+
+def iter_muma(dataframes: List[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    # A conversão MuMa é linha a linha: dá para aplicar arquivo a arquivo,
+    # sem montar o concatenado
+    columns = union_columns(dataframes)
+    for df in dataframes:
+        yield to_muma(df.reindex(columns=columns))
+
+
+def to_muma(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+
+    # Converte as datas para o formato MM/YYYY
+    df['StartDate'] = format_dates(df['StartDate'], '%m/%Y', dayfirst=True)
+    df['EndDate'] = format_dates(df['EndDate'], '%m/%Y', dayfirst=True)
+
+    # Renomeia as colunas conforme o mapping
+    return df.rename(columns=MUMA_MAPPING)
+
+
+def write_xlsx(frames: Union[pd.DataFrame, Iterable[pd.DataFrame]], target,
+               columns: Optional[List[str]] = None) -> int:
+    # Grava em modo de memória constante, dividindo em abas no limite do Excel
+    with stage('serialize'):
+        return write_xlsx_streaming(frames, target, columns=columns)
@@ -0,0 +1,141 @@
+import os
+import zipfile
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from conversor import altafonte, columnar, fuga, onerpm
+from conversor.detect import ALTAFONTE, FUGA, ONERPM
+from conversor.ingest import parallel_map
+from conversor.instrumentation import stage
+from conversor.rasa import write_csv, write_rasa_csv
+from conversor.result import PreparedStatement
+
+ONERPM_SHEETS = {
+    'sales': onerpm.SALES_SHEET,
+    'sharein': onerpm.SHARES_SHEET,
+}
+
+
+@dataclass
+class BatchItem:
+    name: str
+    prepared: Optional[PreparedStatement] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def prepare_statement(distributor: str, data: bytes, report: str = 'sales',
+                      engine: str = 'auto') -> PreparedStatement:
+    # Primeira passada de um extrato, independente da taxa (roda nos processos do pool)
+    if distributor == FUGA:
+        return fuga.prepare_fuga(fuga.read_fuga(data))
+    if distributor == ALTAFONTE:
+        return altafonte.prepare_altafonte(altafonte.read_altafonte(data))
+    if distributor == ONERPM:
+        processor = onerpm.StatementProcessor(engine)
+        df = processor.read(data, ONERPM_SHEETS[report])
+        if report == 'sharein':
+            return processor.prepare_onerpm_sharein(df)
+        return processor.prepare_onerpm(df)
+    raise ValueError(f"Distribuidora não suportada: {distributor}")
+
+
+def prepare_batch(
+    distributor: str,
+    files: List[Tuple[str, bytes]],
+    report: str = 'sales',
+    engine: str = 'auto',
+    max_workers: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int, BatchItem], None]] = None
+) -> List[BatchItem]:
+    # Vários extratos da mesma distribuidora em paralelo (um processo por
+    # núcleo). Os erros ficam em cada BatchItem; a ordem de entrada é mantida
+    total = len(files)
+    results: List[Optional[BatchItem]] = [None] * total
+    done = 0
+
+    def finish(i, prepared, error):
+        nonlocal done
+        results[i] = BatchItem(files[i][0], prepared, None if error is None else str(error))
+        done += 1
+        if on_progress:
+            on_progress(done, total, results[i])
+
+    with stage('batch') as current:
+        parallel_map(
+            prepare_statement,
+            [(distributor, data, report, engine) for _, data in files],
+            max_workers,
+            finish
+        )
+        current.rows = sum(len(item.prepared.df) for item in results if item.ok)
+    return results
+
+
+def totals_frame(items: List[BatchItem], tax_rate: float) -> pd.DataFrame:
+    # Totais por arquivo e a linha de total geral
+    rows = [
+        (item.name, item.prepared.total_gross(), item.prepared.total_net(tax_rate))
+        for item in items if item.ok
+    ]
+    df = pd.DataFrame(rows, columns=['Arquivo', 'Gross', 'Net'])
+    df.loc[len(df.index)] = ['Total', df['Gross'].sum(), df['Net'].sum()]
+    return df
+
+
+def _write(distributor: str, frames, target: Any, fmt: str) -> None:
+    if fmt != 'csv':
+        columnar.write_columnar_chunks(frames, target, fmt)
+    elif distributor == ONERPM:
+        write_rasa_csv(frames, target, onerpm.RASA_SERVICE_NAME)
+    else:
+        write_csv(frames, target)
+
+
+def write_statement(distributor: str, prepared: PreparedStatement, tax_rate: float, target: Any,
+                    fmt: str = 'csv') -> None:
+    # Um extrato só, no formato do download (CSV da distribuidora ou colunar)
+    _write(distributor, [prepared.materialize(tax_rate, formatted=fmt == 'csv')], target, fmt)
+
+
+def write_merged(distributor: str, items: List[BatchItem], tax_rate: float, target: Any,
+                 fmt: str = 'csv') -> None:
+    # Um único arquivo com todos os extratos, montado arquivo a arquivo. Os
+    # extratos seguem as colunas do primeiro; se as colunas não baterem, o
+    # erro diz qual arquivo
+    current = None
+
+    def frames() -> Iterator[pd.DataFrame]:
+        nonlocal current
+        for item in items:
+            if item.ok:
+                current = item.name
+                yield item.prepared.materialize(tax_rate, formatted=fmt == 'csv')
+
+    try:
+        _write(distributor, frames(), target, fmt)
+    except ValueError as e:
+        raise ValueError(f'{current}: {e}') from e
+
+
+def write_zip(distributor: str, items: List[BatchItem], tax_rate: float, target: Any,
+              fmt: str = 'csv', suffix: str = '_processed') -> None:
+    # Um arquivo por extrato, gravados direto dentro do ZIP
+    extension = '.csv' if fmt == 'csv' else columnar.extension(fmt)
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for item in items:
+            if not item.ok:
+                continue
+            name = os.path.splitext(os.path.basename(item.name))[0] + suffix + extension
+            df = item.prepared.materialize(tax_rate, formatted=fmt == 'csv')
+            if fmt != 'csv':
+                # Os escritores do pyarrow precisam de um arquivo com posição
+                archive.writestr(name, columnar.to_columnar_bytes(df, fmt))
+                continue
+            with archive.open(name, 'w') as output:
+                _write(distributor, [df], output, fmt)
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = int(os.environ.get('CONVERSOR_CACHE_MB', '1024')) * 1024 * 1024
+
+
+def content_key(data: bytes, *params: Hashable) -> str:
+    # Chave = hash do conteúdo do arquivo + parâmetros de leitura
+    digest = hashlib.sha256(data)
+    if params:
+        digest.update(repr(params).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ParseCache:
+    # Cache LRU de DataFrames já lidos, limitado pelo total de bytes em memória.
+    # Sempre devolve cópias, para que quem chama possa alterar o DataFrame
+    # (ex.: aplicar o imposto) sem contaminar o que está guardado.
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_held = 0
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0].copy()
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes_held -= self._entries.pop(key)[1]
+            self._entries[key] = (df.copy(), size)
+            self.bytes_held += size
+            while self.bytes_held > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes_held -= evicted
+
+    def get_or_parse(self, data: bytes, parse: Callable[[], pd.DataFrame], *params: Hashable) -> pd.DataFrame:
+        key = content_key(data, *params)
+        df = self.get(key)
+        if df is None:
+            df = parse()
+            self.put(key, df)
+        return df
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes_held = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self.bytes_held,
+                'max_bytes': self.max_bytes,
+            }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (
+            f"Cache de leitura: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['entries']} arquivos, {stats['bytes'] / 1024 / 1024:,.1f} MB"
+        )
+
+
+class ValueCache:
+    # Cache LRU de valores pequenos (ex.: o total de um arquivo), limitado
+    # pelo número de entradas
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+
+# Instâncias únicas do processo: sobrevivem aos reruns e são compartilhadas pelas páginas
+parse_cache = ParseCache()
+totals_cache = ValueCache()
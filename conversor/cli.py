@@ -0,0 +1,75 @@
+import argparse
+import sys
+
+from conversor.detect import ALTAFONTE, FUGA, ONERPM
+from conversor.pipeline import (
+    DEFAULT_TAX_RATES, ONERPM_REPORTS, OUTPUT_FORMATS, BatchOptions, expand_inputs, reports_frame, run_batch
+)
+from conversor.readers import available_engines
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m conversor',
+        description='Converte em lote statements FUGA, Altafonte, ONErpm e Backoffice.'
+    )
+    parser.add_argument('inputs', nargs='+', help='Arquivos, diretórios ou padrões glob')
+    parser.add_argument('-o', '--output-dir', default='output', help='Diretório de saída')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='Processos em paralelo (padrão: número de núcleos)')
+    parser.add_argument('--tax-rate', type=float, default=None,
+                        help='Taxa de imposto (%%) para todas as distribuidoras')
+    parser.add_argument('--fuga-tax-rate', type=float, default=DEFAULT_TAX_RATES[FUGA])
+    parser.add_argument('--altafonte-tax-rate', type=float, default=DEFAULT_TAX_RATES[ALTAFONTE])
+    parser.add_argument('--onerpm-tax-rate', type=float, default=DEFAULT_TAX_RATES[ONERPM])
+    parser.add_argument('--onerpm-report', choices=ONERPM_REPORTS, default='sales',
+                        help='Relatório ONErpm: Sales, Share-In ou ambos')
+    parser.add_argument('--engine', choices=['auto'] + available_engines(), default='auto',
+                        help='Leitor de XLSX para o ONErpm')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help='Formato de saída (parquet/arrow precisam do pyarrow; o '
+                             'concatenado Backoffice sai em xlsx no modo csv)')
+    parser.add_argument('--labels', default=None,
+                        help='Selos FUGA/Altafonte separados por vírgula (padrão: os selos da distribuidora)')
+    parser.add_argument('--per-label', action='store_true',
+                        help='Grava um arquivo por selo para os statements FUGA/Altafonte')
+    parser.add_argument('--muma', action='store_true',
+                        help='Gera também a planilha MuMa a partir dos arquivos Backoffice')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print('Nenhum arquivo .csv/.xlsx/.xls encontrado.', file=sys.stderr)
+        return 1
+
+    tax_rates = {
+        FUGA: args.fuga_tax_rate,
+        ALTAFONTE: args.altafonte_tax_rate,
+        ONERPM: args.onerpm_tax_rate,
+    }
+    if args.tax_rate is not None:
+        tax_rates = {distributor: args.tax_rate for distributor in tax_rates}
+
+    options = BatchOptions(
+        output_dir=args.output_dir,
+        tax_rates=tax_rates,
+        onerpm_report=args.onerpm_report,
+        muma=args.muma,
+        engine=args.engine,
+        output_format=args.format,
+        labels=[label.strip() for label in args.labels.split(',') if label.strip()] if args.labels else None,
+        per_label=args.per_label,
+    )
+
+    def on_report(report):
+        status = f'ERRO: {report.error}' if report.error else report.output or 'ok'
+        print(f'[{report.distributor or "?"}] {report.source} -> {status}', file=sys.stderr)
+
+    reports = run_batch(paths, options, max_workers=args.workers, on_report=on_report)
+    print(reports_frame(reports).to_string(index=False))
+
+    return 1 if any(report.error for report in reports) else 0
@@ -0,0 +1,148 @@
+import importlib.util
+import os
+from io import BytesIO
+from typing import Any, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from conversor.instrumentation import stage
+
+# Formatos colunares opcionais (precisam do pyarrow)
+FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+
+
+def is_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def available_formats() -> list:
+    return list(FORMATS) if is_available() else []
+
+
+def format_for(name: str) -> Optional[str]:
+    extension = os.path.splitext(name)[1].lower()
+    for fmt, (suffix, _) in FORMATS.items():
+        if extension == suffix or (fmt == 'arrow' and extension in ('.feather', '.ipc')):
+            return fmt
+    return None
+
+
+def extension(fmt: str) -> str:
+    return FORMATS[fmt][0]
+
+
+def mime(fmt: str) -> str:
+    return FORMATS[fmt][1]
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    # Colunas object com tipos misturados (ex.: números e texto vindos do
+    # Excel) não viram uma coluna Arrow; essas vão como texto
+    mixed = [column for column in df.columns if _is_mixed(df[column])]
+    if not mixed:
+        return df
+    df = df.copy()
+    for column in mixed:
+        values = df[column].astype(object)
+        df[column] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def _is_mixed(series: pd.Series) -> bool:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Categorias de um único tipo viram dicionário no Arrow
+        return pd.api.types.infer_dtype(series.cat.categories, skipna=True).startswith('mixed')
+    return (
+        series.dtype == object
+        and pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty')
+    )
+
+
+def _schema(df: pd.DataFrame):
+    import pyarrow as pa
+
+    fields = []
+    for column in df.columns:
+        if df[column].dtype == object:
+            fields.append(pa.field(str(column), pa.string()))
+        else:
+            fields.append(pa.field(str(column), pa.Array.from_pandas(df[column].head(0)).type))
+    return pa.schema(fields)
+
+
+def write_columnar(df: pd.DataFrame, target: Any, fmt: str) -> None:
+    write_columnar_chunks([df], target, fmt)
+
+
+def write_columnar_chunks(chunks: Iterable[pd.DataFrame], target: Any, fmt: str) -> None:
+    # Grava bloco a bloco, sem juntar tudo em memória; o esquema vem do
+    # primeiro bloco, com as colunas de texto sempre como string
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    with stage('serialize') as current:
+        try:
+            for chunk in chunks:
+                chunk = _arrow_safe(chunk)
+                if writer is None:
+                    schema = _schema(chunk)
+                    if fmt == 'parquet':
+                        writer = pq.ParquetWriter(target, schema)
+                    else:
+                        writer = pa.ipc.new_file(target, schema)
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                if fmt == 'parquet':
+                    writer.write_table(table)
+                else:
+                    writer.write(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        current.rows = rows
+
+
+def to_columnar_bytes(df: pd.DataFrame, fmt: str) -> bytes:
+    buffer = BytesIO()
+    write_columnar(df, buffer, fmt)
+    return buffer.getvalue()
+
+
+def read_columnar(source: Any, fmt: str) -> pd.DataFrame:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = BytesIO(source)
+    if fmt == 'parquet':
+        return pd.read_parquet(source)
+    return pd.read_feather(source)
+
+
+def iter_columnar(source: Any, fmt: str, columns: Optional[list] = None,
+                  batch_size: int = 500_000) -> Iterator[pd.DataFrame]:
+    # Lê em lotes (row groups / record batches), sem carregar o arquivo
+    # inteiro; colunas pedidas que não existem no arquivo são ignoradas
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = pa.BufferReader(source)
+
+    if fmt == 'parquet':
+        parquet = pq.ParquetFile(source)
+        names = parquet.schema_arrow.names
+        wanted = None if columns is None else [column for column in columns if column in names]
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=wanted):
+            yield batch.to_pandas()
+        return
+
+    reader = pa.ipc.open_file(source)
+    names = reader.schema.names
+    wanted = None if columns is None else [column for column in columns if column in names]
+    for i in range(reader.num_record_batches):
+        table = pa.Table.from_batches([reader.get_batch(i)])
+        yield (table if wanted is None else table.select(wanted)).to_pandas()
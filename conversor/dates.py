@@ -0,0 +1,87 @@
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Formatos testados na detecção, na ordem (mês antes do dia só sem dayfirst).
+# '%Y%m' vem antes de '%Y%m%d': '202411' também casa com '%Y%m%d' (2024-01-01)
+ISO_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d', '%Y-%m', '%Y%m', '%Y%m%d']
+DAYFIRST_FORMATS = ['%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y', '%d.%m.%Y', '%m/%Y']
+MONTHFIRST_FORMATS = ['%m/%d/%Y', '%m/%d/%Y %H:%M:%S', '%m-%d-%Y']
+
+
+def candidate_formats(dayfirst: bool = False) -> list:
+    if dayfirst:
+        return ISO_FORMATS + DAYFIRST_FORMATS + MONTHFIRST_FORMATS
+    return ISO_FORMATS + MONTHFIRST_FORMATS + DAYFIRST_FORMATS
+
+
+def detect_format(values: Iterable[str], dayfirst: bool = False) -> Optional[str]:
+    # Primeiro formato explícito que converte todos os valores
+    values = pd.Index(values).astype(str)
+    for fmt in candidate_formats(dayfirst):
+        try:
+            pd.to_datetime(values, format=fmt)
+        except (ValueError, TypeError):
+            continue
+        return fmt
+    return None
+
+
+def _as_text(uniques: pd.Index) -> Optional[pd.Index]:
+    # Valores candidatos à detecção de formato. Períodos inteiros (202401)
+    # viram texto: o to_datetime leria o número como nanossegundos desde 1970.
+    # O dtype 'str' do pandas 3 também é texto, não só o object
+    if pd.api.types.is_bool_dtype(uniques):
+        return None
+    if pd.api.types.is_float_dtype(uniques) and (uniques % 1 == 0).all():
+        uniques = uniques.astype('int64')
+    if pd.api.types.is_integer_dtype(uniques):
+        return uniques.astype(str)
+    if pd.api.types.is_string_dtype(uniques) or uniques.dtype == object:
+        if all(isinstance(value, str) for value in uniques):
+            return uniques
+    return None
+
+
+def _parse_unique(uniques, dayfirst: bool, errors: str) -> pd.DatetimeIndex:
+    if isinstance(uniques, pd.DatetimeIndex) or pd.api.types.is_datetime64_any_dtype(uniques):
+        return pd.DatetimeIndex(uniques)
+
+    uniques = pd.Index(uniques)
+    text = _as_text(uniques)
+    if text is not None:
+        fmt = detect_format(text, dayfirst)
+        if fmt is not None:
+            return pd.DatetimeIndex(pd.to_datetime(text, format=fmt))
+
+    # Valores mistos (datetime do Excel, números...): inferência só nos únicos
+    return pd.DatetimeIndex(pd.to_datetime(uniques, dayfirst=dayfirst, errors=errors))
+
+
+def _factorize(series: pd.Series):
+    # Statements têm poucas datas distintas: converte cada uma uma única vez
+    codes, uniques = pd.factorize(series)
+    return codes, uniques, codes == -1
+
+
+def to_datetime_cached(series: pd.Series, dayfirst: bool = False, errors: str = 'raise') -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    codes, uniques, missing = _factorize(series)
+    if len(uniques) == 0:
+        return pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    parsed = _parse_unique(uniques, dayfirst, errors)
+    result = pd.Series(parsed.take(np.where(missing, 0, codes)), index=series.index)
+    return result.mask(missing)
+
+
+def format_dates(series: pd.Series, fmt: str, dayfirst: bool = False, errors: str = 'raise') -> pd.Series:
+    # Converte e formata só os valores únicos e espalha o resultado pela coluna
+    codes, uniques, missing = _factorize(series)
+    if len(uniques) == 0:
+        return pd.Series(np.nan, index=series.index, dtype=object)
+    formatted = np.asarray(_parse_unique(uniques, dayfirst, errors).strftime(fmt), dtype=object)
+    values = formatted[np.where(missing, 0, codes)]
+    values[missing] = np.nan
+    return pd.Series(values, index=series.index, dtype=object)
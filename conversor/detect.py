@@ -0,0 +1,46 @@
+import os
+from typing import Optional
+
+import pandas as pd
+
+from conversor.columnar import format_for
+from conversor.sniff import detect_encoding, read_prefix
+
+FUGA = 'fuga'
+ALTAFONTE = 'altafonte'
+ONERPM = 'onerpm'
+BACKOFFICE = 'backoffice'
+
+DISTRIBUTORS = [FUGA, ALTAFONTE, ONERPM, BACKOFFICE]
+EXTENSIONS = ('.csv', '.xlsx', '.xls', '.parquet', '.arrow', '.feather')
+
+
+def _first_line(path: str, size: int = 4096) -> str:
+    prefix = read_prefix(path, size)
+    return prefix.decode(detect_encoding(prefix, 'latin1'), errors='replace').split('\n', 1)[0]
+
+
+def detect_distributor(path: str) -> Optional[str]:
+    # Identifica a distribuidora pelo cabeçalho (CSV) ou pelas abas (Excel)
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        header = _first_line(path)
+        if 'Product Label' in header and 'Reported Royalty' in header:
+            return FUGA
+        if 'SELLO' in header:
+            return ALTAFONTE
+        return None
+
+    # Dados Backoffice já exportados em formato colunar
+    if format_for(path) is not None:
+        return BACKOFFICE
+
+    if extension in ('.xlsx', '.xls'):
+        with pd.ExcelFile(path) as workbook:
+            sheets = workbook.sheet_names
+        if 'Sales' in sheets or 'Shares In & Out' in sheets:
+            return ONERPM
+        return BACKOFFICE
+
+    return None
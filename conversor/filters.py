@@ -0,0 +1,92 @@
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from conversor.cache import ValueCache
+
+
+class ColumnIndex:
+    # Coluna de filtro convertida em códigos inteiros uma única vez. Cada
+    # conjunto de valores permitidos vira uma tabela de consulta por código,
+    # então filtrar é uma indexação de inteiros, sem comparar textos por linha
+
+    def __init__(self, values: pd.Series):
+        codes, self.categories = pd.factorize(values)
+        # O código 0 fica para os vazios
+        self.codes = codes + 1
+        self._positions: Optional[List[np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def table(self, values: Optional[Iterable] = None, pattern: Optional[str] = None) -> np.ndarray:
+        # Código -> permitido. O padrão (regex) é avaliado só nos valores distintos
+        table = np.zeros(len(self.categories) + 1, dtype=bool)
+        if values is not None:
+            found = self.categories.get_indexer(pd.Index(list(values)))
+            table[found[found >= 0] + 1] = True
+        if pattern is not None:
+            matches = pd.Series(self.categories).astype(str).str.contains(pattern, regex=True)
+            table[1:] |= matches.to_numpy(dtype=bool)
+        return table
+
+    def mask(self, values: Optional[Iterable] = None, pattern: Optional[str] = None) -> np.ndarray:
+        return self.table(values, pattern)[self.codes]
+
+    def positions(self) -> List[np.ndarray]:
+        # Linhas de cada código, numa única ordenação estável
+        if self._positions is None:
+            order = np.argsort(self.codes, kind='stable')
+            counts = np.bincount(self.codes, minlength=len(self.categories) + 1)
+            self._positions = np.split(order, np.cumsum(counts)[:-1])
+        return self._positions
+
+    def rows(self, values: Optional[Iterable] = None, pattern: Optional[str] = None) -> np.ndarray:
+        # Posições das linhas permitidas, na ordem original, sem varrer a coluna de novo
+        positions = self.positions()
+        parts = [positions[code] for code in np.flatnonzero(self.table(values, pattern))]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+
+# Índices por arquivo (chave do conteúdo + coluna); poucos, porque ocupam
+# duas posições inteiras por linha
+index_cache = ValueCache(max_entries=32)
+
+
+def column_index(df: pd.DataFrame, column: str, key: Optional[str] = None) -> ColumnIndex:
+    if key is None:
+        return ColumnIndex(df[column])
+
+    cache_key = f'{key}:{column}'
+    index = index_cache.get(cache_key)
+    if index is None or len(index) != len(df):
+        index = ColumnIndex(df[column])
+        index_cache.put(cache_key, index)
+    return index
+
+
+@dataclass(frozen=True)
+class LabelFilter:
+    # Filtro configurável: valores exatos e/ou um padrão (regex) sobre uma coluna
+    column: str
+    values: Optional[tuple] = None
+    pattern: Optional[str] = None
+
+    def with_values(self, values: Optional[Iterable]) -> 'LabelFilter':
+        return self if values is None else replace(self, values=tuple(values))
+
+    def mask(self, df: pd.DataFrame, key: Optional[str] = None) -> np.ndarray:
+        return column_index(df, self.column, key).mask(self.values, self.pattern)
+
+    def apply(self, df: pd.DataFrame, key: Optional[str] = None) -> pd.DataFrame:
+        return df[self.mask(df, key)]
+
+    def split(self, df: pd.DataFrame, groups: Dict[str, Iterable],
+              key: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        # Vários conjuntos de valores (ex.: um por selo) extraídos do mesmo índice
+        index = column_index(df, self.column, key)
+        return {name: df.iloc[index.rows(values)] for name, values in groups.items()}
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+# Agrupa os dígitos de milhar: '1234567' -> '1.234.567'
+_THOUSANDS_RE = r'\B(?=(\d{3})+(?!\d))'
+
+
+def format_number_br(values, decimals: int = 2, na_rep: str = 'nan') -> pd.Series:
+    # Formata uma coluna inteira no padrão brasileiro/europeu (1.234,56)
+    # usando aritmética inteira e operações de string vetorizadas, em vez
+    # de um f-string + três replace por célula.
+    series = pd.to_numeric(pd.Series(values), errors='coerce')
+    missing = series.isna()
+
+    scale = 10 ** decimals
+    scaled = np.round(series.abs().fillna(0).to_numpy(dtype='float64') * scale).astype('int64')
+    int_part = pd.Series(scaled // scale, index=series.index).astype(str)
+    int_part = int_part.str.replace(_THOUSANDS_RE, '.', regex=True)
+
+    sign = pd.Series(np.where(series.to_numpy() < 0, '-', ''), index=series.index)
+    result = sign + int_part
+    if decimals > 0:
+        frac_part = pd.Series(scaled % scale, index=series.index).astype(str).str.zfill(decimals)
+        result = result + ',' + frac_part
+
+    return result.mask(missing, na_rep)
+
+
+def format_currency_br(values, decimals: int = 2, symbol: str = 'R$') -> pd.Series:
+    return symbol + format_number_br(values, decimals)
@@ -0,0 +1,150 @@
+from typing import IO, Any, Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from conversor.filters import LabelFilter
+from conversor.instrumentation import stage
+from conversor.result import PREVIEW_ROWS, ConversionResult, PreparedStatement, apply_tax
+from conversor.sniff import CsvDialect, read_csv, sniff, to_number
+from conversor.summary import RoyaltySummary, summarize
+
+FUGA_LABELS = ['Elemess', 'Elemess Label Services']
+FUGA_TAX_RATE = 18.5
+FUGA_CHUNKSIZE = 200_000
+ROYALTY_COLUMN = 'Reported Royalty'
+
+# Colunas numéricas restauradas no modo streaming (lido todo como texto),
+# para a saída ter os mesmos tipos da leitura em memória
+INTEGER_COLUMNS = ['Product UPC', 'Sale Units']
+NUMBER_COLUMNS = ['Original Gross Income', 'Exchange Rate', 'Converted Gross Income']
+
+# Formato de exportação padrão; o real é detectado pelo começo do arquivo
+FUGA_DIALECT = CsvDialect(encoding='utf-8', sep=',', decimal='.')
+REQUIRED_COLUMNS = ['Product Label', ROYALTY_COLUMN]
+
+# Colunas usadas no resumo pré-agregado
+FUGA_DIMENSIONS = {
+    'label': 'Product Label',
+    'territory': 'Territory',
+    'store': 'DSP',
+    'month': 'Sale Start Date',
+}
+
+LABEL_FILTER = LabelFilter('Product Label', tuple(FUGA_LABELS))
+
+
+def read_fuga(file: Any, dialect: Optional[CsvDialect] = None) -> pd.DataFrame:
+    dialect = dialect or sniff(file, FUGA_DIALECT)
+    with stage('parse') as current:
+        df = read_csv(file, dialect, REQUIRED_COLUMNS)
+        current.rows = len(df)
+    return df
+
+
+def _prepare(filtered_df: pd.DataFrame) -> PreparedStatement:
+    with stage('summary', rows=len(filtered_df)):
+        summary = summarize(filtered_df, ROYALTY_COLUMN, FUGA_DIMENSIONS)
+    return PreparedStatement(filtered_df, ROYALTY_COLUMN, summary)
+
+
+def prepare_fuga(df: pd.DataFrame, labels: Optional[Iterable[str]] = None,
+                 key: Optional[str] = None) -> PreparedStatement:
+    # key: chave do conteúdo do arquivo, para reaproveitar o índice do filtro
+    with stage('filter') as current:
+        filtered_df = LABEL_FILTER.with_values(labels).apply(df, key)
+        current.rows = len(filtered_df)
+    return _prepare(filtered_df)
+
+
+def prepare_fuga_by_label(df: pd.DataFrame, labels: Optional[Iterable[str]] = None,
+                          key: Optional[str] = None) -> Dict[str, PreparedStatement]:
+    # Um resultado por selo, todos tirados do mesmo índice
+    with stage('filter') as current:
+        parts = LABEL_FILTER.split(df, {label: [label] for label in labels or FUGA_LABELS}, key)
+        current.rows = sum(len(part) for part in parts.values())
+    return {label: _prepare(part) for label, part in parts.items()}
+
+
+def process_fuga(df: pd.DataFrame, tax_rate: float,
+                 labels: Optional[Iterable[str]] = None) -> ConversionResult:
+    return prepare_fuga(df, labels).result(tax_rate)
+
+
+def _numbers(chunk: pd.DataFrame, dialect: CsvDialect) -> pd.DataFrame:
+    # Inteiros viram Int64 (aceita vazios): o tipo não muda de um bloco para
+    # outro só porque um deles tem células vazias
+    for column in INTEGER_COLUMNS + NUMBER_COLUMNS:
+        if column not in chunk.columns:
+            continue
+        values = to_number(chunk[column], dialect)
+        if column in INTEGER_COLUMNS and (values.dropna() % 1 == 0).all():
+            values = values.astype('Int64')
+        chunk[column] = values
+    return chunk
+
+
+def _stream_fuga(file: Any, output: IO[str], tax_rate: float, chunksize: int,
+                 preview_rows: Optional[int], labels: Optional[Iterable[str]] = None) -> PreparedStatement:
+    # Lê o CSV em blocos: todas as colunas como texto (sem inferência de tipos),
+    # só 'Reported Royalty' e as colunas numéricas conhecidas viram número.
+    # Não dá para ler só as colunas usadas: a saída regrava todas elas. Cada bloco é filtrado,
+    # entra no resumo e é gravado direto em `output`; só uma prévia fica em memória.
+    summary = RoyaltySummary()
+    preview = []
+    kept = 0
+    header = True
+    label_filter = LABEL_FILTER.with_values(labels)
+    dialect = sniff(file, FUGA_DIALECT)
+
+    with stage('stream') as current:
+        for chunk in read_csv(file, dialect, REQUIRED_COLUMNS, dtype=str, chunksize=chunksize):
+            chunk = _numbers(label_filter.apply(chunk).copy(), dialect)
+
+            royalty = to_number(chunk[ROYALTY_COLUMN], dialect)
+            chunk[ROYALTY_COLUMN] = royalty
+            summary.add(chunk, ROYALTY_COLUMN, FUGA_DIMENSIONS)
+            chunk[ROYALTY_COLUMN] = apply_tax(royalty, tax_rate)
+
+            chunk.to_csv(output, index=False, header=header)
+            header = False
+
+            if preview_rows and kept < preview_rows and len(chunk):
+                preview.append(chunk.head(preview_rows - kept))
+                kept += len(preview[-1])
+        current.rows = summary.rows
+
+    preview_df = pd.concat(preview, ignore_index=True) if preview else pd.DataFrame()
+    return PreparedStatement(preview_df, ROYALTY_COLUMN, summary)
+
+
+def prepare_fuga_chunked(file: Any, output: IO[str], chunksize: int = FUGA_CHUNKSIZE,
+                         preview_rows: Optional[int] = PREVIEW_ROWS,
+                         labels: Optional[Iterable[str]] = None) -> PreparedStatement:
+    # Grava as linhas filtradas com os valores brutos; o imposto é aplicado
+    # depois, só no download, com apply_tax_chunked
+    return _stream_fuga(file, output, 0.0, chunksize, preview_rows, labels)
+
+
+def iter_taxed_chunks(source: Any, tax_rate: float,
+                      chunksize: int = FUGA_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    # Lê o arquivo gravado por prepare_fuga_chunked (números com ponto decimal)
+    for chunk in pd.read_csv(source, sep=',', dtype=str, chunksize=chunksize):
+        chunk = _numbers(chunk, FUGA_DIALECT)
+        chunk[ROYALTY_COLUMN] = apply_tax(pd.to_numeric(chunk[ROYALTY_COLUMN], errors='coerce'), tax_rate)
+        yield chunk
+
+
+def apply_tax_chunked(source: Any, output: IO[str], tax_rate: float,
+                      chunksize: int = FUGA_CHUNKSIZE) -> None:
+    header = True
+    for chunk in iter_taxed_chunks(source, tax_rate, chunksize):
+        chunk.to_csv(output, index=False, header=header)
+        header = False
+
+
+def process_fuga_chunked(file: Any, tax_rate: float, output: IO[str],
+                         chunksize: int = FUGA_CHUNKSIZE,
+                         preview_rows: Optional[int] = PREVIEW_ROWS,
+                         labels: Optional[Iterable[str]] = None) -> ConversionResult:
+    prepared = _stream_fuga(file, output, tax_rate, chunksize, preview_rows, labels)
+    return ConversionResult(prepared.df, prepared.total_gross(), prepared.total_net(tax_rate))
@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from conversor import columnar
+from conversor.cache import ParseCache, content_key
+from conversor.instrumentation import stage
+
+
+@dataclass
+class IngestResult:
+    name: str
+    df: Optional[pd.DataFrame] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _read_workbook(name: str, data: bytes, read_kwargs: dict) -> IngestResult:
+    try:
+        # Parquet/Arrow exportados antes dispensam a leitura do Excel
+        fmt = columnar.format_for(name)
+        if fmt is not None:
+            return IngestResult(name, columnar.read_columnar(data, fmt))
+        return IngestResult(name, pd.read_excel(BytesIO(data), **read_kwargs))
+    except Exception as e:
+        return IngestResult(name, error=str(e))
+
+
+def parallel_map(func: Callable, args: List[tuple], max_workers: Optional[int] = None,
+                 on_result: Optional[Callable[[int, Any, Optional[Exception]], None]] = None) -> None:
+    # Executa func(*args[i]) em processos separados (um por núcleo) e chama
+    # on_result(i, resultado, erro) à medida que cada um termina
+    workers = min(max_workers or os.cpu_count() or 1, len(args))
+
+    if workers <= 1:
+        for i, item in enumerate(args):
+            try:
+                result, error = func(*item), None
+            except Exception as e:
+                result, error = None, e
+            if on_result:
+                on_result(i, result, error)
+        return
+
+    # 'spawn' evita fazer fork do servidor do Streamlit, que é multi-thread
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {executor.submit(func, *item): i for i, item in enumerate(args)}
+        for future in as_completed(futures):
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            if on_result:
+                on_result(futures[future], result, error)
+
+
+def _read_workbooks(
+    files: Iterable[Tuple[str, bytes]],
+    max_workers: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int, IngestResult], None]] = None,
+    cache: Optional[ParseCache] = None,
+    **read_kwargs
+) -> List[IngestResult]:
+    files = list(files)
+    total = len(files)
+    results: List[Optional[IngestResult]] = [None] * total
+    keys = [None] * total
+    done = 0
+
+    pending = []
+    columnar_files = []
+    for i, (name, data) in enumerate(files):
+        if cache is not None:
+            keys[i] = content_key(data, 'excel', tuple(sorted(read_kwargs.items())))
+            df = cache.get(keys[i])
+            if df is not None:
+                results[i] = IngestResult(name, df)
+                done += 1
+                if on_progress:
+                    on_progress(done, total, results[i])
+                continue
+        if columnar.format_for(name) is not None:
+            # Leitura colunar é rápida: não compensa mandar para o pool
+            columnar_files.append(i)
+        else:
+            pending.append(i)
+
+    def finish(i, result):
+        nonlocal done
+        results[i] = result
+        if cache is not None and result.ok:
+            cache.put(keys[i], result.df)
+        done += 1
+        if on_progress:
+            on_progress(done, total, result)
+
+    for i in columnar_files:
+        name, data = files[i]
+        finish(i, _read_workbook(name, data, read_kwargs))
+
+    def finish_pending(j, result, error):
+        i = pending[j]
+        finish(i, result if error is None else IngestResult(files[i][0], error=str(error)))
+
+    parallel_map(
+        _read_workbook,
+        [(files[i][0], files[i][1], read_kwargs) for i in pending],
+        max_workers,
+        finish_pending
+    )
+
+    return results
+
+
+def read_workbooks(
+    files: Iterable[Tuple[str, bytes]],
+    max_workers: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int, IngestResult], None]] = None,
+    cache: Optional[ParseCache] = None,
+    **read_kwargs
+) -> List[IngestResult]:
+    # Lê várias planilhas em paralelo (um processo por núcleo). Os erros ficam
+    # em cada IngestResult, sem interromper o lote; a ordem de entrada é mantida.
+    # Com cache, os arquivos já lidos antes não voltam para o pool.
+    with stage('parse') as current:
+        results = _read_workbooks(files, max_workers, on_progress, cache, **read_kwargs)
+        current.rows = sum(len(result.df) for result in results if result.ok)
+    return results
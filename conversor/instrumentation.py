@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+# Intervalo entre as amostras de memória durante uma etapa
+SAMPLE_SECONDS = 0.05
+
+
+@dataclass
+class StageRecord:
+    processor: str
+    stage: str
+    seconds: float
+    rows: Optional[int]
+    rss_mb: Optional[float]
+    peak_rss_mb: Optional[float]
+    started_at: str
+
+
+class StageLog:
+    # Registro das etapas (leitura, filtro, imposto, template, formatação,
+    # serialização) reportadas pelos processadores durante recording().
+    # Os trabalhos em segundo plano gravam de outras threads enquanto a
+    # página lê: tudo passa pelo lock
+
+    def __init__(self):
+        self.records: List[StageRecord] = []
+        self._lock = threading.Lock()
+
+    def append(self, record: StageRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def snapshot(self) -> List[StageRecord]:
+        with self._lock:
+            return list(self.records)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([asdict(record) for record in self.snapshot()],
+                            columns=list(StageRecord.__dataclass_fields__))
+
+    def to_json(self) -> str:
+        return json.dumps([asdict(record) for record in self.snapshot()], indent=2)
+
+    def to_csv(self) -> str:
+        return self.to_frame().to_csv(index=False)
+
+
+class _Stage:
+    rows: Optional[int] = None
+    peak: Optional[float] = None
+
+    def sample(self, rss: Optional[float]) -> None:
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+
+_current_log: ContextVar[Optional[StageLog]] = ContextVar('stage_log', default=None)
+_current_processor: ContextVar[str] = ContextVar('stage_processor', default='')
+
+
+def _rss_mb() -> Optional[float]:
+    # Memória residente atual: psutil se houver, senão /proc (Linux)
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _PeakSampler:
+    # O ru_maxrss é o pico da vida toda do processo: num servidor Streamlit,
+    # depois do primeiro arquivo grande toda etapa mostraria o mesmo número.
+    # Aqui uma única thread amostra a memória residente enquanto houver etapa
+    # medida em andamento, e cada etapa guarda o maior valor visto durante ela.
+    # A memória é do processo: etapas simultâneas em outras threads contam juntas
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, handle: _Stage) -> None:
+        with self._lock:
+            self._active.add(handle)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stage-peak-sampler', daemon=True)
+                self._thread.start()
+
+    def stop(self, handle: _Stage) -> None:
+        with self._lock:
+            self._active.discard(handle)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(SAMPLE_SECONDS)
+            with self._lock:
+                active = list(self._active)
+                if not active:
+                    self._thread = None
+                    return
+            rss = _rss_mb()
+            for handle in active:
+                handle.sample(rss)
+
+
+_sampler = _PeakSampler()
+
+
+def start_recording(log: StageLog, processor: str) -> None:
+    # Como recording(), sem bloco: vale até o fim do contexto atual. Para o
+    # topo das páginas, que rodam do início ao fim a cada execução
+    _current_log.set(log)
+    _current_processor.set(processor)
+
+
+@contextmanager
+def recording(log: StageLog, processor: str) -> Iterator[StageLog]:
+    log_token = _current_log.set(log)
+    processor_token = _current_processor.set(processor)
+    try:
+        yield log
+    finally:
+        _current_processor.reset(processor_token)
+        _current_log.reset(log_token)
+
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None) -> Iterator[_Stage]:
+    # Sem recording() ativo não mede nada
+    handle = _Stage()
+    handle.rows = rows
+    log = _current_log.get()
+    if log is None:
+        yield handle
+        return
+
+    started_at = datetime.now().isoformat(timespec='seconds')
+    handle.sample(_rss_mb())
+    _sampler.start(handle)
+    start = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        seconds = time.perf_counter() - start
+        _sampler.stop(handle)
+        rss = _rss_mb()
+        handle.sample(rss)
+        peak = handle.peak
+        log.append(StageRecord(
+            processor=_current_processor.get(),
+            stage=name,
+            seconds=round(seconds, 6),
+            rows=handle.rows,
+            rss_mb=round(rss, 1) if rss is not None else None,
+            peak_rss_mb=round(peak, 1) if peak is not None else None,
+            started_at=started_at,
+        ))
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+PENDING = 'na fila'
+RUNNING = 'executando'
+DONE = 'concluído'
+FAILED = 'erro'
+
+# Conversões simultâneas; a leitura de planilhas já usa um pool de processos próprio
+DEFAULT_WORKERS = int(os.environ.get('CONVERSOR_JOB_WORKERS', 2))
+
+# Trabalhos concluídos mantidos no armazenamento de resultados
+DEFAULT_MAX_FINISHED = int(os.environ.get('CONVERSOR_JOB_HISTORY', 50))
+
+
+@dataclass
+class Job:
+    id: str
+    name: str
+    key: Optional[str] = None
+    status: str = PENDING
+    progress: Optional[float] = None
+    message: str = ''
+    result: Any = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    files: List[str] = field(default_factory=list)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at or time.time()
+        return end - (self.started_at or self.submitted_at)
+
+
+_current_job: ContextVar[Optional[Job]] = ContextVar('current_job', default=None)
+
+
+def report(progress: Optional[float] = None, message: Optional[str] = None) -> None:
+    # Atualiza o andamento do trabalho em execução; fora de um trabalho não faz nada
+    job = _current_job.get()
+    if job is None:
+        return
+    if progress is not None:
+        job.progress = progress
+    if message is not None:
+        job.message = message
+
+
+def track_file(path: str) -> None:
+    # Arquivo de saída do trabalho: é apagado junto com o resultado
+    job = _current_job.get()
+    if job is not None:
+        job.files.append(path)
+
+
+class JobRefs:
+    # Trabalhos referenciados por uma sessão (espaço na página -> id). Enquanto
+    # o objeto existir (fica no session_state), esses trabalhos e seus arquivos
+    # não são descartados; quando a sessão acaba, a referência some junto.
+    # Não é um dict: a fila guarda as referências num WeakSet, que exige hash
+
+    def __init__(self):
+        self.slots: Dict[str, str] = {}
+
+
+class JobQueue:
+    # Executor local em threads, sem broker externo. Os trabalhos e seus
+    # resultados ficam no processo, então sobrevivem aos reruns e à troca de
+    # página; a interface consulta pelo id (ou pela chave do conteúdo)
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, max_finished: int = DEFAULT_MAX_FINISHED):
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._keys = {}
+        self._refs: 'weakref.WeakSet[JobRefs]' = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def register(self, refs: JobRefs) -> JobRefs:
+        with self._lock:
+            self._refs.add(refs)
+        return refs
+
+    def submit(self, name: str, func: Callable, *args, key: Optional[str] = None, **kwargs) -> Job:
+        # Com chave, o mesmo conteúdo não é processado duas vezes: devolve o
+        # trabalho em andamento, concluído ou com erro em vez de criar outro.
+        # Um erro fica até alguém pedir para tentar de novo (forget)
+        with self._lock:
+            if key is not None and key in self._keys:
+                return self._jobs[self._keys[key]]
+
+            job = Job(uuid.uuid4().hex, name, key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._keys[key] = job.id
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='conversor-job')
+            executor = self._executor
+
+        # O contexto é copiado: o registro de instrumentação ativo acompanha o trabalho
+        executor.submit(copy_context().run, self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job: Job, func: Callable, args: tuple, kwargs: dict) -> None:
+        _current_job.set(job)
+        job.status, job.started_at = RUNNING, time.time()
+        try:
+            job.result = func(*args, **kwargs)
+            job.progress = 1.0
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            self._evict()
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, key: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(self._keys.get(key))
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def forget(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return
+            if job.key is not None and self._keys.get(job.key) == job_id:
+                del self._keys[job.key]
+        for path in job.files:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _evict(self) -> None:
+        # Descarta os resultados mais antigos além do limite, menos os que
+        # alguma sessão ainda usa (resultado na tela, arquivo para download)
+        with self._lock:
+            referenced = {job_id for refs in list(self._refs) for job_id in list(refs.slots.values())}
+            finished = [job.id for job in self._jobs.values() if job.finished]
+            excess = max(len(finished) - self.max_finished, 0)
+            evict = [job_id for job_id in finished if job_id not in referenced][:excess]
+        for job_id in evict:
+            self.forget(job_id)
+
+
+# Instância única do processo, compartilhada pelas sessões e páginas
+job_queue = JobQueue()
@@ -0,0 +1,120 @@
+from typing import Optional
+
+import pandas as pd
+
+from conversor.dates import format_dates
+from conversor.filters import LabelFilter
+from conversor.instrumentation import stage
+from conversor.readers import read_sheet
+from conversor.result import ConversionResult, PreparedStatement
+from conversor.summary import summarize
+
+ONERPM_TAX_RATE = 18.5
+SALES_SHEET = 'Sales'
+SHARES_SHEET = 'Shares In & Out'
+ROYALTY_COLUMN = 'Net'
+TEMPLATE_ROYALTY_COLUMN = 'Net. Royalty'
+RASA_SERVICE_NAME = 'ONERPM'
+
+TEMPLATE_COLUMNS = [
+    'Start Date', 'End Date', 'Country', 'UPC', 'ISRC', 'Title',
+    'Net. PPD', 'Total Net. PPD', 'Gross PPD', 'Total Gross PPD',
+    'Gross Royalty', 'Net. Revenue', 'Consumer Price', 'Total Consumer Price',
+    'Net. Royalty', 'Currency', 'Quantity', 'Sale Type', 'User Type',
+    'Artist', 'Release Name', 'Store Name', 'Device', 'Label', 'DSP Asset',
+    'DSP Product', 'DSP Vendor'
+]
+
+TEMPLATE_MAPPING = {
+    'Start Date': ('Transaction Month', True),
+    'End Date': ('Accounted Date', False),
+    'Country': 'Territory',
+    'UPC': 'Parent ID',
+    'ISRC': 'ID',
+    'Title': 'Title',
+    'Net. Revenue': 'Gross',
+    'Net. Royalty': 'Net',
+    'Currency': 'Currency',
+    'Quantity': 'Quantity',
+    'Sale Type': 'Sales Type',
+    'Artist': 'Artists',
+    'Release Name': 'Album/Channel',
+    'Store Name': 'Store',
+    'Label': 'Label'
+}
+
+# Colunas do ONErpm realmente usadas (template + filtro do Share-In)
+SOURCE_COLUMNS = [
+    value[0] if isinstance(value, tuple) else value
+    for value in TEMPLATE_MAPPING.values()
+] + ['Share Type']
+
+# Colunas usadas no resumo pré-agregado
+ONERPM_DIMENSIONS = {
+    'label': 'Label',
+    'territory': 'Territory',
+    'store': 'Store',
+    'month': 'Transaction Month',
+}
+
+# 'In' como palavra inteira ('Share In'), avaliado só nos valores distintos
+SHARE_IN_FILTER = LabelFilter('Share Type', pattern=r'\bIn\b')
+
+
+class StatementProcessor:
+    def __init__(self, engine: str = 'auto'):
+        self.engine = engine
+
+    def read(self, data: bytes, sheet_name: str) -> pd.DataFrame:
+        # Lê só as colunas usadas, em streaming
+        with stage('parse') as current:
+            df = read_sheet(data, sheet_name, usecols=SOURCE_COLUMNS, engine=self.engine)
+            current.rows = len(df)
+        return df
+
+    def format_date(self, series, is_start_date=False):
+        if pd.isna(series).all():
+            return series
+        if is_start_date:
+            return format_dates(series, '01/%m/%Y')
+        return format_dates(series, '%d/%m/%Y')
+
+    def transform_to_template(self, df: pd.DataFrame) -> pd.DataFrame:
+        new_df = pd.DataFrame(columns=TEMPLATE_COLUMNS)
+        for new_col, value in TEMPLATE_MAPPING.items():
+            if isinstance(value, tuple):
+                old_col, is_start_date = value
+                if old_col in df.columns:
+                    new_df[new_col] = self.format_date(df[old_col], is_start_date)
+            elif value in df.columns:
+                new_df[new_col] = df[value]
+
+        return new_df
+
+    def prepare(self, df: pd.DataFrame) -> PreparedStatement:
+        # O template é montado uma vez com os valores brutos; o imposto só
+        # incide sobre 'Net. Royalty' ao materializar
+        with stage('template', rows=len(df)):
+            template_df = self.transform_to_template(df)
+        with stage('summary', rows=len(df)):
+            summary = summarize(df, ROYALTY_COLUMN, ONERPM_DIMENSIONS)
+        return PreparedStatement(template_df, TEMPLATE_ROYALTY_COLUMN, summary)
+
+    def prepare_onerpm(self, df: pd.DataFrame, key: Optional[str] = None) -> PreparedStatement:
+        # Relatório Sales: sem filtro (key só mantém a mesma assinatura do Share-In)
+        return self.prepare(df)
+
+    def prepare_onerpm_sharein(self, df: pd.DataFrame, key: Optional[str] = None) -> PreparedStatement:
+        if 'Share Type' not in df.columns:
+            raise ValueError("Column 'Share Type' not found")
+
+        with stage('filter') as current:
+            filtered_df = SHARE_IN_FILTER.apply(df, key)
+            current.rows = len(filtered_df)
+        return self.prepare(filtered_df)
+
+    def process_onerpm(self, df: pd.DataFrame, tax_rate: float) -> ConversionResult:
+        return self.prepare_onerpm(df).result(tax_rate)
+
+    def process_onerpm_sharein(self, df: pd.DataFrame, tax_rate: float) -> ConversionResult:
+        return self.prepare_onerpm_sharein(df).result(tax_rate)
@@ -0,0 +1,313 @@
+import glob
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from conversor import altafonte, backoffice, columnar, fuga, onerpm
+from conversor.detect import ALTAFONTE, BACKOFFICE, EXTENSIONS, FUGA, ONERPM, detect_distributor
+from conversor.ingest import read_workbooks
+from conversor.rasa import write_rasa_csv
+
+DEFAULT_TAX_RATES = {
+    FUGA: fuga.FUGA_TAX_RATE,
+    ALTAFONTE: altafonte.ALTAFONTE_TAX_RATE,
+    ONERPM: onerpm.ONERPM_TAX_RATE,
+}
+
+ONERPM_REPORTS = ['sales', 'sharein', 'both']
+OUTPUT_FORMATS = ['csv'] + list(columnar.FORMATS)
+
+
+@dataclass
+class BatchOptions:
+    output_dir: str
+    tax_rates: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_TAX_RATES))
+    onerpm_report: str = 'sales'
+    muma: bool = False
+    engine: str = 'auto'
+    output_format: str = 'csv'
+    # Selos FUGA/Altafonte (None: os selos padrão de cada distribuidora)
+    labels: Optional[List[str]] = None
+    per_label: bool = False
+    # Nome de saída por arquivo de entrada (ver output_stems); sem entrada, o nome do arquivo
+    stems: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class FileReport:
+    source: str
+    distributor: Optional[str]
+    output: Optional[str] = None
+    total_gross: Optional[float] = None
+    total_net: Optional[float] = None
+    error: Optional[str] = None
+
+
+def expand_inputs(inputs: Iterable[str]) -> List[str]:
+    # Aceita arquivos, diretórios e padrões glob
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in sorted(os.listdir(item))]
+        else:
+            candidates = sorted(glob.glob(item)) or [item]
+        paths.extend(
+            path for path in candidates
+            if os.path.isfile(path) and path.lower().endswith(EXTENSIONS)
+        )
+    return list(dict.fromkeys(paths))
+
+
+def _stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def output_stems(paths: List[str]) -> Dict[str, str]:
+    # Arquivos com o mesmo nome em diretórios diferentes (jan/statement.csv,
+    # fev/statement.csv) levam o caminho relativo no nome, para uma saída
+    # não sobrescrever a outra
+    groups: Dict[str, List[str]] = {}
+    for path in paths:
+        groups.setdefault(_stem(path).lower(), []).append(path)
+
+    stems = {}
+    for group in groups.values():
+        if len(group) == 1:
+            stems[group[0]] = _stem(group[0])
+            continue
+        absolute = [os.path.abspath(path) for path in group]
+        try:
+            root = os.path.commonpath([os.path.dirname(path) for path in absolute])
+        except ValueError:
+            root = ''
+        for path, full in zip(group, absolute):
+            relative = os.path.splitext(os.path.relpath(full, root) if root else full)[0]
+            stems[path] = re.sub(r'[\\/:]+', '_', relative).strip('_')
+
+    # Um nome composto ainda pode coincidir com outro arquivo: numera
+    seen = set()
+    for path in paths:
+        stem, n = stems[path], 1
+        while stem.lower() in seen:
+            n += 1
+            stem = f'{stems[path]}_{n}'
+        seen.add(stem.lower())
+        stems[path] = stem
+    return stems
+
+
+def _output_path(options: BatchOptions, source: str, suffix: str) -> str:
+    stem = options.stems.get(source) or _stem(source)
+    return os.path.join(options.output_dir, stem + suffix)
+
+
+def _write_output(df: pd.DataFrame, options: BatchOptions, source: str, suffix: str,
+                  write_csv: Callable[[pd.DataFrame, str], None]) -> str:
+    if options.output_format == 'csv':
+        output = _output_path(options, source, suffix + '.csv')
+        write_csv(df, output)
+    else:
+        output = _output_path(options, source, suffix + columnar.extension(options.output_format))
+        columnar.write_columnar(df, output, options.output_format)
+    return output
+
+
+def _write_rasa_csv(df: pd.DataFrame, output: str) -> None:
+    write_rasa_csv(df, output, onerpm.RASA_SERVICE_NAME)
+
+
+def convert_file(path: str, distributor: str, options: BatchOptions) -> List[FileReport]:
+    # Converte um arquivo de distribuidora e grava o(s) arquivo(s) de saída
+    tax_rate = options.tax_rates[distributor]
+
+    if distributor in (FUGA, ALTAFONTE) and options.per_label:
+        return _convert_per_label(path, distributor, options)
+
+    if distributor == FUGA:
+        if options.output_format == 'csv':
+            output = _output_path(options, path, '_processed.csv')
+            with open(output, 'w', encoding='utf-8', newline='') as f:
+                result = fuga.process_fuga_chunked(path, tax_rate, f, preview_rows=0, labels=options.labels)
+            return [FileReport(path, distributor, output, result.total_gross, result.total_net)]
+
+        # Colunar: primeira passada grava os brutos num CSV temporário, a
+        # segunda aplica o imposto e grava bloco a bloco
+        output = _output_path(options, path, '_processed' + columnar.extension(options.output_format))
+        fd, gross_path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                prepared = fuga.prepare_fuga_chunked(path, f, preview_rows=0, labels=options.labels)
+            columnar.write_columnar_chunks(
+                fuga.iter_taxed_chunks(gross_path, tax_rate), output, options.output_format
+            )
+        finally:
+            os.remove(gross_path)
+        return [FileReport(path, distributor, output, prepared.total_gross(), prepared.total_net(tax_rate))]
+
+    if distributor == ALTAFONTE:
+        prepared = altafonte.prepare_altafonte(altafonte.read_altafonte(path), options.labels)
+        result = prepared.result(tax_rate, formatted=options.output_format == 'csv')
+        output = _write_output(
+            result.df, options, path, '_processed',
+            lambda df, target: df.to_csv(target, index=False, sep=',')
+        )
+        return [FileReport(path, distributor, output, result.total_gross, result.total_net)]
+
+    if distributor == ONERPM:
+        processor = onerpm.StatementProcessor(options.engine)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        reports = []
+        if options.onerpm_report in ('sales', 'both'):
+            result = processor.process_onerpm(processor.read(data, onerpm.SALES_SHEET), tax_rate)
+            output = _write_output(result.df, options, path, '_rasa-template', _write_rasa_csv)
+            reports.append(FileReport(path, distributor, output, result.total_gross, result.total_net))
+        if options.onerpm_report in ('sharein', 'both'):
+            result = processor.process_onerpm_sharein(processor.read(data, onerpm.SHARES_SHEET), tax_rate)
+            output = _write_output(result.df, options, path, '_rasa-template-sharein', _write_rasa_csv)
+            reports.append(FileReport(path, distributor, output, result.total_gross, result.total_net))
+        return reports
+
+    raise ValueError(f"Distribuidora não suportada: {distributor}")
+
+
+def _convert_per_label(path: str, distributor: str, options: BatchOptions) -> List[FileReport]:
+    # Lê o extrato uma vez e grava um arquivo por selo, todos do mesmo índice
+    tax_rate = options.tax_rates[distributor]
+    if distributor == FUGA:
+        prepared = fuga.prepare_fuga_by_label(fuga.read_fuga(path), options.labels)
+    else:
+        prepared = altafonte.prepare_altafonte_by_label(altafonte.read_altafonte(path), options.labels)
+
+    reports = []
+    for label, statement in prepared.items():
+        result = statement.result(tax_rate, formatted=options.output_format == 'csv')
+        output = _write_output(
+            result.df, options, path, '_' + re.sub(r'\W+', '_', label).strip('_') + '_processed',
+            lambda df, target: df.to_csv(target, index=False)
+        )
+        reports.append(FileReport(path, distributor, output, result.total_gross, result.total_net))
+    return reports
+
+
+def _convert_safely(path: str, distributor: str, options: BatchOptions) -> List[FileReport]:
+    try:
+        return convert_file(path, distributor, options)
+    except Exception as e:
+        return [FileReport(path, distributor, error=str(e))]
+
+
+def convert_backoffice(paths: List[str], options: BatchOptions,
+                       max_workers: Optional[int] = None) -> List[FileReport]:
+    # Os arquivos Backoffice são consolidados: concatenação, totais e MuMa
+    files = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            files.append((path, f.read()))
+
+    reports = []
+    dataframes = []
+    names = []
+    totals = []
+    for result in read_workbooks(files, max_workers=max_workers):
+        if not result.ok:
+            reports.append(FileReport(result.name, BACKOFFICE, error=result.error))
+            continue
+        dataframes.append(result.df)
+        names.append(os.path.basename(result.name))
+        total = backoffice.royalties_total(result.df)
+        if backoffice.is_statement_file(os.path.basename(result.name)) and total is not None:
+            totals.append((os.path.basename(result.name), total))
+        reports.append(FileReport(result.name, BACKOFFICE, total_gross=total))
+
+    if not dataframes:
+        return reports
+
+    dataframes, drifts = backoffice.align_workbooks(dataframes, names)
+    drifts = backoffice.drift_table(drifts)
+    if not drifts.empty:
+        drifts.to_csv(os.path.join(options.output_dir, 'esquema_backoffice.csv'), index=False)
+
+    if options.output_format == 'csv':
+        backoffice.write_xlsx(
+            dataframes, os.path.join(options.output_dir, 'arquivos_concatenados.xlsx'),
+            columns=backoffice.union_columns(dataframes)
+        )
+    else:
+        columnar.write_columnar(
+            backoffice.concat_workbooks(dataframes),
+            os.path.join(options.output_dir, 'arquivos_concatenados' + columnar.extension(options.output_format)),
+            options.output_format
+        )
+
+    if totals:
+        backoffice.totals_table(totals).to_csv(
+            os.path.join(options.output_dir, 'totais_backoffice.csv'), index=False
+        )
+
+    if options.muma:
+        backoffice.write_xlsx(
+            backoffice.iter_muma(dataframes),
+            os.path.join(options.output_dir, 'planilha_muma.xlsx')
+        )
+
+    return reports
+
+
+def run_batch(paths: List[str], options: BatchOptions, max_workers: Optional[int] = None,
+              on_report: Optional[Callable[[FileReport], None]] = None) -> List[FileReport]:
+    os.makedirs(options.output_dir, exist_ok=True)
+    options = replace(options, stems={**output_stems(paths), **options.stems})
+
+    reports = []
+
+    def add(report: FileReport) -> None:
+        reports.append(report)
+        if on_report:
+            on_report(report)
+
+    jobs = []
+    backoffice_paths = []
+    for path in paths:
+        try:
+            distributor = detect_distributor(path)
+        except Exception as e:
+            add(FileReport(path, None, error=str(e)))
+            continue
+        if distributor is None:
+            add(FileReport(path, None, error='Distribuidora não reconhecida'))
+        elif distributor == BACKOFFICE:
+            backoffice_paths.append(path)
+        else:
+            jobs.append((path, distributor))
+
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        for path, distributor in jobs:
+            for report in _convert_safely(path, distributor, options):
+                add(report)
+    elif jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_convert_safely, path, distributor, options)
+                for path, distributor in jobs
+            ]
+            for future in as_completed(futures):
+                for report in future.result():
+                    add(report)
+
+    if backoffice_paths:
+        for report in convert_backoffice(backoffice_paths, options, max_workers):
+            add(report)
+
+    return reports
+
+
+def reports_frame(reports: List[FileReport]) -> pd.DataFrame:
+    return pd.DataFrame([report.__dict__ for report in reports])
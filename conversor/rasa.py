@@ -0,0 +1,80 @@
+import io
+from typing import IO, Any, Iterable, Optional, Union
+
+import pandas as pd
+
+from conversor.instrumentation import stage
+
+# O cabeçalho do modelo RASA tem 29 campos: 'ServiceName', o nome do serviço
+# e o restante vazio
+RASA_HEADER_FIELDS = 29
+
+
+def rasa_header(service_name: str) -> str:
+    return 'ServiceName,' + service_name + ',' * (RASA_HEADER_FIELDS - 2) + '\n'
+
+
+def _aligned(df: pd.DataFrame, columns: pd.Index) -> pd.DataFrame:
+    # Só o primeiro bloco leva cabeçalho: os seguintes seguem a ordem das
+    # colunas dele. Colunas diferentes deslocariam os valores sem aviso
+    if df.columns.equals(columns):
+        return df
+    missing = [column for column in columns if column not in df.columns]
+    extra = [column for column in df.columns if column not in columns]
+    details = []
+    if missing:
+        details.append('faltando ' + ', '.join(map(str, missing)))
+    if extra:
+        details.append('a mais ' + ', '.join(map(str, extra)))
+    if details:
+        raise ValueError('Colunas diferentes do primeiro bloco (' + '; '.join(details) + ')')
+    return df.reindex(columns=columns)
+
+
+def _write(frames: Iterable[pd.DataFrame], binary: IO[bytes], preamble: str, encoding: str) -> int:
+    # O to_csv escreve em blocos direto no arquivo: nenhuma string com o CSV
+    # inteiro é montada
+    text = io.TextIOWrapper(binary, encoding=encoding, newline='')
+    rows = 0
+    try:
+        text.write(preamble)
+        columns = None
+        for df in frames:
+            header = columns is None
+            if header:
+                columns = df.columns
+            else:
+                df = _aligned(df, columns)
+            df.to_csv(text, index=False, header=header)
+            rows += len(df)
+    finally:
+        text.flush()
+        text.detach()
+    return rows
+
+
+def write_csv(frames: Union[pd.DataFrame, Iterable[pd.DataFrame]], target: Any = None,
+              preamble: str = '', encoding: str = 'utf-8') -> Optional[bytes]:
+    # Grava um ou vários blocos como um único CSV (cabeçalho só no primeiro).
+    # target pode ser um caminho ou um arquivo binário; sem target, devolve os bytes
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+
+    with stage('serialize') as current:
+        if target is None:
+            buffer = io.BytesIO()
+            current.rows = _write(frames, buffer, preamble, encoding)
+            return buffer.getvalue()
+
+        if isinstance(target, (str, bytes)) or hasattr(target, '__fspath__'):
+            with open(target, 'wb') as binary:
+                current.rows = _write(frames, binary, preamble, encoding)
+        else:
+            current.rows = _write(frames, target, preamble, encoding)
+    return None
+
+
+def write_rasa_csv(frames: Union[pd.DataFrame, Iterable[pd.DataFrame]], target: Any = None,
+                   service_name: str = 'ONERPM', encoding: str = 'utf-8') -> Optional[bytes]:
+    # Modelo RASA: cabeçalho do serviço + linhas, numa única passada
+    return write_csv(frames, target, rasa_header(service_name), encoding)
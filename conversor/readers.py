@@ -0,0 +1,95 @@
+import importlib.util
+import operator
+from io import BytesIO
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+# Cada leitor recebe (bytes do arquivo, nome da aba, colunas desejadas ou None)
+# e devolve um DataFrame apenas com essas colunas.
+SheetReader = Callable[[bytes, str, Optional[List[str]]], pd.DataFrame]
+
+_READERS: Dict[str, SheetReader] = {}
+
+# Ordem de preferência do modo 'auto'
+_PREFERENCE = ['calamine', 'openpyxl']
+
+
+def register_reader(name: str, reader: SheetReader, available: bool = True) -> None:
+    if available:
+        _READERS[name] = reader
+
+
+def available_engines() -> List[str]:
+    return list(_READERS)
+
+
+def read_sheet(data: bytes, sheet_name: str, usecols: Optional[Iterable[str]] = None,
+               engine: str = 'auto') -> pd.DataFrame:
+    columns = list(usecols) if usecols is not None else None
+    if engine == 'auto':
+        engine = next(name for name in _PREFERENCE + list(_READERS) if name in _READERS)
+    if engine not in _READERS:
+        raise ValueError(f"Engine '{engine}' not available. Options: {', '.join(_READERS)}")
+    return _READERS[engine](data, sheet_name, columns)
+
+
+def _pandas_usecols(columns: Optional[List[str]]):
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return lambda name: name in wanted
+
+
+def read_sheet_pandas(data: bytes, sheet_name: str, columns: Optional[List[str]]) -> pd.DataFrame:
+    # Caminho original: pandas + modelo completo do openpyxl
+    return pd.read_excel(BytesIO(data), sheet_name=sheet_name, engine='openpyxl',
+                         usecols=_pandas_usecols(columns))
+
+
+def read_sheet_calamine(data: bytes, sheet_name: str, columns: Optional[List[str]]) -> pd.DataFrame:
+    # Leitor em Rust (python-calamine), suportado pelo pandas >= 2.2
+    return pd.read_excel(BytesIO(data), sheet_name=sheet_name, engine='calamine',
+                         usecols=_pandas_usecols(columns))
+
+
+def read_sheet_openpyxl(data: bytes, sheet_name: str, columns: Optional[List[str]]) -> pd.DataFrame:
+    # openpyxl em modo read-only: percorre as linhas em streaming, sem montar
+    # o modelo de células, e guarda só as colunas pedidas.
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        if columns is None:
+            positions = [i for i, name in enumerate(header) if name is not None]
+        else:
+            wanted = set(columns)
+            positions = [i for i, name in enumerate(header) if name in wanted]
+        names = [header[i] for i in positions]
+        if not positions:
+            return pd.DataFrame(columns=names)
+
+        width = max(positions) + 1
+        pick = operator.itemgetter(*positions)
+        if len(positions) == 1:
+            single = pick
+            pick = lambda row: (single(row),)
+        records = [
+            pick(row if len(row) >= width else row + (None,) * (width - len(row)))
+            for row in rows
+        ]
+    finally:
+        workbook.close()
+
+    df = pd.DataFrame.from_records(records, columns=names)
+    # O modo read-only pode devolver linhas vazias no fim da aba
+    return df.dropna(how='all').reset_index(drop=True).infer_objects()
+
+
+register_reader('pandas', read_sheet_pandas)
+register_reader('openpyxl', read_sheet_openpyxl)
+register_reader('calamine', read_sheet_calamine,
+                available=(importlib.util.find_spec('python_calamine') is not None
+                           and tuple(int(part) for part in pd.__version__.split('.')[:2]) >= (2, 2)))
@@ -0,0 +1,480 @@
+import argparse
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from conversor import columnar
+from conversor.dates import format_dates
+from conversor.detect import ALTAFONTE, BACKOFFICE, FUGA, ONERPM
+from conversor.instrumentation import stage
+from conversor.pipeline import expand_inputs
+from conversor.rasa import write_csv
+from conversor.result import PREVIEW_ROWS
+from conversor.sniff import CsvDialect, csv_source, read_prefix, sniff, to_number
+
+KEYS = ['isrc', 'upc', 'period']
+
+# O Backoffice não tem UPC: o padrão cruza por ISRC e mês
+DEFAULT_KEYS = ['isrc', 'period']
+
+RECONCILE_CHUNKSIZE = 500_000
+
+# Diferença aceita por chave (arredondamentos)
+TOLERANCE = 0.01
+
+# Somas parciais acumuladas antes de reduzir a tabela em memória
+COMPACT_ROWS = 1_000_000
+
+# Acima disso as somas por chave vão para o disco, em SPILL_PARTITIONS partições
+SPILL_KEYS = 5_000_000
+SPILL_PARTITIONS = 16
+
+OK = 'ok'
+DIVERGENT = 'divergente'
+ONLY_CONVERSOR = 'só conversor'
+ONLY_BACKOFFICE = 'só backoffice'
+
+
+@dataclass(frozen=True)
+class SourceLayout:
+    # Onde ficam as chaves e o valor em cada tipo de arquivo
+    columns: Dict[str, str]
+    value: str
+    dayfirst: bool = False
+    # Formato dos números gravados pelo conversor. Não dá para detectar: a
+    # saída do Altafonte é separada por vírgula e traz NET como '1.234,56'
+    numbers: CsvDialect = CsvDialect()
+
+
+LAYOUTS = {
+    FUGA: SourceLayout(
+        {'isrc': 'Asset ISRC', 'upc': 'Product UPC', 'period': 'Sale Start Date'}, 'Reported Royalty'
+    ),
+    ALTAFONTE: SourceLayout(
+        {'isrc': 'ISRC', 'upc': 'EAN', 'period': 'PERIODO'}, 'NET',
+        numbers=CsvDialect(decimal=',', thousands='.')
+    ),
+    ONERPM: SourceLayout(
+        {'isrc': 'ISRC', 'upc': 'UPC', 'period': 'Start Date'}, 'Net. Royalty', dayfirst=True
+    ),
+    BACKOFFICE: SourceLayout(
+        {'isrc': 'ISRC', 'period': 'StartDate'}, 'ROYALTIES_TO_BE_PAID', dayfirst=True
+    ),
+}
+
+
+def common_keys(distributor: str) -> List[str]:
+    # Chaves presentes tanto na saída do conversor quanto no Backoffice
+    return [key for key in KEYS if key in LAYOUTS[distributor].columns and key in LAYOUTS[BACKOFFICE].columns]
+
+
+@dataclass
+class ReconcileSummary:
+    keys: int = 0
+    matched: int = 0
+    divergent: int = 0
+    only_conversor: int = 0
+    only_backoffice: int = 0
+    total_conversor: float = 0.0
+    total_backoffice: float = 0.0
+
+    @property
+    def difference(self) -> float:
+        return self.total_conversor - self.total_backoffice
+
+    def add(self, diff: pd.DataFrame) -> None:
+        status = diff['Status']
+        self.keys += len(diff)
+        self.matched += int((status == OK).sum())
+        self.divergent += int((status == DIVERGENT).sum())
+        self.only_conversor += int((status == ONLY_CONVERSOR).sum())
+        self.only_backoffice += int((status == ONLY_BACKOFFICE).sum())
+        self.total_conversor += float(diff['Conversor'].sum())
+        self.total_backoffice += float(diff['Backoffice'].sum())
+
+
+# ---------------------------------------------------------------------------
+# Leitura em blocos
+# ---------------------------------------------------------------------------
+
+def _source_name(source: Any) -> str:
+    if isinstance(source, tuple):
+        return source[0]
+    return os.fspath(source) if isinstance(source, str) or hasattr(source, '__fspath__') else ''
+
+
+def _source_data(source: Any) -> Any:
+    return source[1] if isinstance(source, tuple) else source
+
+
+def _csv_chunks(data: Any, columns: List[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    # Tudo como texto (códigos mantêm os zeros à esquerda); o valor vira
+    # número depois, no formato do layout. O modelo RASA tem uma linha de
+    # serviço antes do cabeçalho
+    skiprows = 1 if read_prefix(data, 64).startswith(b'ServiceName,') else 0
+    dialect = sniff(data)
+    source, extra = csv_source(data)
+    yield from pd.read_csv(
+        source, sep=dialect.sep, encoding=dialect.encoding, dtype=str, skiprows=skiprows,
+        usecols=lambda column: column in columns, chunksize=chunksize, **extra
+    )
+
+
+def _excel_chunks(data: Any, columns: List[str], chunksize: int) -> Iterator[pd.DataFrame]:
+    # O Excel não é lido em blocos: todas as abas (o concatenado pode ter
+    # várias), fatiadas depois
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = BytesIO(data)
+    sheets = pd.read_excel(data, sheet_name=None, usecols=lambda column: column in columns)
+    for df in sheets.values():
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+
+def iter_chunks(source: Any, columns: List[str],
+                chunksize: int = RECONCILE_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    # source: DataFrame, caminho ou (nome, bytes)
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+        return
+
+    name, data = _source_name(source), _source_data(source)
+    fmt = columnar.format_for(name)
+    if fmt is not None:
+        yield from columnar.iter_columnar(data, fmt, columns, chunksize)
+    elif name.lower().endswith(('.xlsx', '.xls')):
+        yield from _excel_chunks(data, columns, chunksize)
+    else:
+        yield from _csv_chunks(data, columns, chunksize)
+
+
+# ---------------------------------------------------------------------------
+# Chaves e somas por chave
+# ---------------------------------------------------------------------------
+
+def _map_unique(values: pd.Series, func) -> pd.Series:
+    # Normaliza só os valores distintos e espalha pelos códigos
+    codes, uniques = pd.factorize(values)
+    if len(uniques) == 0:
+        return pd.Series(np.nan, index=values.index, dtype=object)
+    normalized = np.asarray(func(pd.Series(uniques)), dtype=object)
+    result = normalized[np.where(codes == -1, 0, codes)]
+    result[codes == -1] = np.nan
+    return pd.Series(result, index=values.index, dtype=object)
+
+
+def _codes(values: pd.Series) -> pd.Series:
+    # ISRC/UPC só com letras e dígitos, em maiúsculas (remove '=""', hífens, espaços)
+    if pd.api.types.is_float_dtype(values):
+        values = values.astype('Int64')
+    return values.astype(str).str.upper().str.replace(r'[^0-9A-Z]', '', regex=True)
+
+
+def _upc(values: pd.Series) -> pd.Series:
+    return _codes(values).str.lstrip('0')
+
+
+def _period(values: pd.Series, dayfirst: bool) -> pd.Series:
+    # Mês 'AAAA-MM'; períodos 'AAAAMM' (texto ou número) também são detectados
+    return format_dates(values, '%Y-%m', dayfirst=dayfirst, errors='coerce')
+
+
+def key_frame(df: pd.DataFrame, layout: SourceLayout, keys: List[str]) -> pd.DataFrame:
+    frame = {}
+    for key in keys:
+        column = layout.columns.get(key)
+        if column is None or column not in df.columns:
+            raise ValueError(f"Coluna para a chave '{key}' não encontrada ({column or 'não mapeada'})")
+        if key == 'period':
+            frame[key] = _period(df[column], layout.dayfirst)
+        elif key == 'upc':
+            frame[key] = _map_unique(df[column], _upc)
+        else:
+            frame[key] = _map_unique(df[column], _codes)
+    return pd.DataFrame(frame, index=df.index)
+
+
+def _values(values: pd.Series, layout: SourceLayout) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    return to_number(values.astype(str), layout.numbers)
+
+
+def aggregate(df: pd.DataFrame, layout: SourceLayout, keys: List[str]) -> pd.DataFrame:
+    # Somas de um bloco por chave. O índice é o hash de 64 bits da chave:
+    # agrupar e cruzar por um inteiro é bem mais barato que por várias colunas de texto
+    if layout.value not in df.columns:
+        raise ValueError(f"Coluna de valor '{layout.value}' não encontrada")
+    frame = key_frame(df, layout, keys)
+    frame['value'] = _values(df[layout.value], layout).fillna(0).to_numpy()
+    frame.index = pd.util.hash_pandas_object(frame[keys], index=False).to_numpy()
+    return _reduce([frame])
+
+
+def _reduce(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    df = pd.concat(frames) if len(frames) > 1 else frames[0]
+    keys = [column for column in df.columns if column not in ('value', 'rows')]
+    grouped = df.groupby(level=0, sort=False)
+    result = grouped[keys].first()
+    result['value'] = grouped['value'].sum()
+    result['rows'] = grouped['rows'].sum() if 'rows' in df.columns else grouped.size()
+    return result
+
+
+class KeyTotals:
+    # Somas por chave acumuladas bloco a bloco. Em memória, as somas parciais
+    # são reduzidas em lotes, não a cada bloco. Com partitions > 1, ou quando
+    # a tabela passa de spill_keys chaves, as somas vão para arquivos
+    # temporários (uma partição por hash % partitions) e só uma partição por
+    # vez volta para a memória
+
+    def __init__(self, partitions: int = 1, directory: Optional[str] = None, spill_keys: int = SPILL_KEYS):
+        self.partitions = max(partitions, 1)
+        self.spill_keys = spill_keys
+        self._parent = directory
+        self._memory: Optional[pd.DataFrame] = None
+        self._pending: List[pd.DataFrame] = []
+        self._pending_rows = 0
+        self._directory: Optional[str] = None
+        if self.partitions > 1:
+            self._directory = tempfile.mkdtemp(prefix='reconcile_', dir=directory)
+
+    def _path(self, partition: int) -> str:
+        return os.path.join(self._directory, f'{partition}.pkl')
+
+    def _spill(self, totals: pd.DataFrame) -> None:
+        partition = totals.index.to_numpy() % np.uint64(self.partitions)
+        for number in np.unique(partition):
+            with open(self._path(int(number)), 'ab') as f:
+                pickle.dump(totals[partition == number], f)
+
+    def _compact(self) -> None:
+        frames = ([self._memory] if self._memory is not None else []) + self._pending
+        self._pending, self._pending_rows = [], 0
+        if not frames:
+            return
+        self._memory = _reduce(frames)
+        if len(self._memory) > self.spill_keys:
+            # Grande demais para ficar em memória: passa a gravar em disco
+            self.partitions = SPILL_PARTITIONS
+            self._directory = tempfile.mkdtemp(prefix='reconcile_', dir=self._parent)
+            self._spill(self._memory)
+            self._memory = None
+
+    def add(self, totals: pd.DataFrame) -> None:
+        if self._directory is not None:
+            self._spill(totals)
+            return
+        self._pending.append(totals)
+        self._pending_rows += len(totals)
+        # Reduz quando as parciais chegam ao tamanho da tabela: cada soma
+        # parcial passa por poucas reduções, em vez de uma por bloco
+        if self._pending_rows >= max(COMPACT_ROWS, len(self._memory) if self._memory is not None else 0):
+            self._compact()
+
+    def finish(self) -> None:
+        if self._directory is None:
+            self._compact()
+
+    def partition(self, number: int, count: int) -> Optional[pd.DataFrame]:
+        # Chaves com hash % count == number. Em memória, filtra a tabela;
+        # em disco, count é o próprio número de partições
+        if self._directory is None:
+            if self._memory is None or count == 1:
+                return self._memory
+            return self._memory[self._memory.index.to_numpy() % np.uint64(count) == number]
+        path = self._path(number)
+        if not os.path.exists(path):
+            return None
+        frames = []
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    frames.append(pickle.load(f))
+                except EOFError:
+                    break
+        return _reduce(frames)
+
+    def close(self) -> None:
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+
+def collect(sources: Iterable[Tuple[Any, str]], keys: List[str], partitions: int = 1,
+            chunksize: int = RECONCILE_CHUNKSIZE) -> KeyTotals:
+    # sources: (fonte, distribuidora) — o layout vem da distribuidora
+    totals = KeyTotals(partitions)
+    try:
+        for source, distributor in sources:
+            layout = LAYOUTS[distributor]
+            columns = [layout.columns[key] for key in keys if key in layout.columns] + [layout.value]
+            for chunk in iter_chunks(source, columns, chunksize):
+                totals.add(aggregate(chunk, layout, keys))
+        totals.finish()
+    except Exception:
+        totals.close()
+        raise
+    return totals
+
+
+# ---------------------------------------------------------------------------
+# Diferenças
+# ---------------------------------------------------------------------------
+
+def _empty(keys: List[str]) -> pd.DataFrame:
+    # Mesmo tipo de índice dos hashes, para o join não converter as chaves
+    return pd.DataFrame(columns=keys + ['value', 'rows'], index=pd.Index([], dtype='uint64'), dtype=object)
+
+
+def diff_totals(conversor: Optional[pd.DataFrame], backoffice: Optional[pd.DataFrame],
+                keys: List[str], tolerance: float = TOLERANCE) -> pd.DataFrame:
+    # Hash join (outer) pelo índice e diferenças vetorizadas
+    conversor = _empty(keys) if conversor is None else conversor
+    backoffice = _empty(keys) if backoffice is None else backoffice
+    joined = conversor.join(backoffice, how='outer', lsuffix='_c', rsuffix='_b')
+
+    result = pd.DataFrame(index=joined.index)
+    for key in keys:
+        result[key] = joined[f'{key}_c'].combine_first(joined[f'{key}_b'])
+
+    in_conversor = joined['value_c'].notna().to_numpy()
+    in_backoffice = joined['value_b'].notna().to_numpy()
+    result['Conversor'] = pd.to_numeric(joined['value_c']).fillna(0).to_numpy()
+    result['Backoffice'] = pd.to_numeric(joined['value_b']).fillna(0).to_numpy()
+    result['Diferença'] = result['Conversor'] - result['Backoffice']
+    result['Status'] = np.select(
+        [~in_backoffice, ~in_conversor, np.abs(result['Diferença'].to_numpy()) > tolerance],
+        [ONLY_CONVERSOR, ONLY_BACKOFFICE, DIVERGENT],
+        OK
+    )
+    return result.reset_index(drop=True)
+
+
+def iter_differences(conversor: KeyTotals, backoffice: KeyTotals, keys: List[str],
+                     tolerance: float = TOLERANCE) -> Iterator[pd.DataFrame]:
+    # Uma partição por vez: a memória fica limitada às chaves de uma partição.
+    # Os dois lados usam a mesma divisão (um lado em memória é filtrado por ela)
+    count = max(conversor.partitions, backoffice.partitions)
+    for number in range(count):
+        diff = diff_totals(conversor.partition(number, count), backoffice.partition(number, count), keys, tolerance)
+        if len(diff):
+            yield diff
+
+
+def _largest(frames: List[pd.DataFrame], rows: int) -> pd.DataFrame:
+    # As `rows` chaves com a maior diferença absoluta, da maior para a menor
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    order = np.argsort(-np.abs(df['Diferença'].to_numpy()), kind='stable')[:rows]
+    return df.iloc[order].reset_index(drop=True)
+
+
+def reconcile(conversor_sources: Iterable[Tuple[Any, str]], backoffice_sources: Iterable[Any],
+              keys: Optional[List[str]] = None, tolerance: float = TOLERANCE, partitions: int = 1,
+              chunksize: int = RECONCILE_CHUNKSIZE, output: Any = None,
+              preview_rows: int = PREVIEW_ROWS,
+              on_progress=None) -> Tuple[ReconcileSummary, pd.DataFrame]:
+    # Cruza as saídas dos conversores com os dados Backoffice por chave.
+    # Devolve o resumo e só as preview_rows maiores diferenças, para a memória
+    # não crescer com o número de chaves; com output, todas as chaves vão
+    # para o CSV, partição a partição
+    keys = list(keys or DEFAULT_KEYS)
+    summary = ReconcileSummary()
+    largest: Optional[pd.DataFrame] = None
+
+    with stage('reconcile') as current:
+        if on_progress:
+            on_progress(0.0, 'Somando as saídas dos conversores')
+        conversor = collect(conversor_sources, keys, partitions, chunksize)
+        try:
+            if on_progress:
+                on_progress(0.4, 'Somando os dados Backoffice')
+            backoffice = collect(
+                ((source, BACKOFFICE) for source in backoffice_sources), keys, partitions, chunksize
+            )
+            try:
+                if on_progress:
+                    on_progress(0.8, 'Comparando por chave')
+
+                def diffs():
+                    nonlocal largest
+                    for diff in iter_differences(conversor, backoffice, keys, tolerance):
+                        summary.add(diff)
+                        divergent = diff[diff['Status'] != OK]
+                        if len(divergent) and preview_rows > 0:
+                            frames = [divergent] if largest is None else [largest, divergent]
+                            largest = _largest(frames, preview_rows)
+                        yield diff
+
+                if output is not None:
+                    write_csv(diffs(), output)
+                else:
+                    for _ in diffs():
+                        pass
+            finally:
+                backoffice.close()
+        finally:
+            conversor.close()
+        current.rows = summary.keys
+
+    if largest is None:
+        largest = pd.DataFrame(columns=keys + ['Conversor', 'Backoffice', 'Diferença', 'Status'])
+    return summary, largest
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m conversor.reconcile',
+        description='Compara as saídas dos conversores com os dados Backoffice por chave (ISRC, período).'
+    )
+    parser.add_argument('inputs', nargs='+', help='Saídas do conversor (arquivos, diretórios ou padrões glob)')
+    parser.add_argument('-d', '--distributor', choices=[FUGA, ALTAFONTE, ONERPM], required=True,
+                        help='Distribuidora das saídas do conversor')
+    parser.add_argument('-b', '--backoffice', nargs='+', required=True, help='Arquivos Backoffice')
+    parser.add_argument('-o', '--output', default='reconciliacao.csv', help='CSV com todas as chaves')
+    parser.add_argument('--keys', default=','.join(DEFAULT_KEYS),
+                        help=f"Chaves separadas por vírgula ({', '.join(KEYS)})")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--partitions', type=int, default=1,
+                        help='Partições em disco para bases maiores que a memória')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    keys = [key.strip() for key in args.keys.split(',') if key.strip()]
+    unknown = [key for key in keys if key not in common_keys(args.distributor)]
+    if unknown:
+        print(f"Chaves indisponíveis para {args.distributor}/Backoffice: {', '.join(unknown)}", file=sys.stderr)
+        return 1
+
+    inputs = expand_inputs(args.inputs)
+    backoffice = expand_inputs(args.backoffice)
+    if not inputs or not backoffice:
+        print('Nenhum arquivo encontrado.', file=sys.stderr)
+        return 1
+
+    summary, differences = reconcile(
+        [(path, args.distributor) for path in inputs], backoffice, keys,
+        args.tolerance, args.partitions, output=args.output
+    )
+    print(differences.head(50).to_string(index=False))
+    print(
+        f'{summary.keys} chaves: {summary.matched} ok, {summary.divergent} divergentes, '
+        f'{summary.only_conversor} só no conversor, {summary.only_backoffice} só no Backoffice. '
+        f'Diferença total: {summary.difference:,.2f}',
+        file=sys.stderr
+    )
+    return 0 if summary.keys == summary.matched else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
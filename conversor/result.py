@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional
+
+import pandas as pd
+
+from conversor.instrumentation import stage
+
+if TYPE_CHECKING:
+    from conversor.summary import RoyaltySummary
+
+
+# Linhas da pré-visualização nas páginas
+PREVIEW_ROWS = 1000
+
+
+@dataclass
+class ConversionResult:
+    df: pd.DataFrame
+    total_gross: float
+    total_net: float
+
+
+def apply_tax(values, tax_rate: float):
+    return values * (1 - tax_rate / 100)
+
+
+@dataclass
+class PreparedStatement:
+    # Resultado da primeira passada, independente da taxa: dados já filtrados
+    # e transformados, ainda com os valores brutos, mais o resumo agregado.
+    # O conjunto líquido completo só é montado em materialize().
+    df: pd.DataFrame
+    royalty_column: str
+    summary: 'RoyaltySummary'
+    # Formatação de texto da saída CSV (ex.: números pt-BR); os formatos
+    # colunares ficam com os tipos numéricos
+    finalize: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+
+    def total_gross(self) -> float:
+        return self.summary.total_gross
+
+    def total_net(self, tax_rate: float) -> float:
+        return self.summary.total_net(tax_rate)
+
+    def materialize(self, tax_rate: float, rows: Optional[int] = None, formatted: bool = True) -> pd.DataFrame:
+        with stage('tax') as current:
+            df = self.df.head(rows).copy() if rows is not None else self.df.copy()
+            df[self.royalty_column] = apply_tax(df[self.royalty_column], tax_rate)
+            current.rows = len(df)
+        return self.finalize(df) if self.finalize and formatted else df
+
+    def result(self, tax_rate: float, formatted: bool = True) -> ConversionResult:
+        return ConversionResult(
+            self.materialize(tax_rate, formatted=formatted), self.total_gross(), self.total_net(tax_rate)
+        )
@@ -0,0 +1,158 @@
+import codecs
+import csv
+import os
+import re
+from dataclasses import dataclass, replace
+from io import BytesIO
+from typing import Any, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# Tamanho do trecho inicial analisado
+SNIFF_BYTES = 64 * 1024
+
+DELIMITERS = [',', ';', '\t', '|']
+
+# Números com vírgula decimal (1.234,56 / 0,5) e com ponto decimal (1,234.56 / 0.5)
+COMMA_DECIMAL = re.compile(r'^[-+]?(\d{1,3}(\.\d{3})+|\d+),\d+$')
+DOT_DECIMAL = re.compile(r'^[-+]?(\d{1,3}(,\d{3})+|\d+)\.\d+$')
+
+
+@dataclass(frozen=True)
+class CsvDialect:
+    encoding: str = 'utf-8'
+    sep: str = ','
+    decimal: str = '.'
+    thousands: Optional[str] = None
+    header: Tuple[str, ...] = ()
+
+    def read_kwargs(self) -> dict:
+        return {'sep': self.sep, 'decimal': self.decimal, 'thousands': self.thousands, 'encoding': self.encoding}
+
+    def missing(self, columns: Iterable[str]) -> List[str]:
+        return [column for column in columns if column not in self.header]
+
+
+def _is_path(source: Any) -> bool:
+    return isinstance(source, str) or hasattr(source, '__fspath__')
+
+
+def read_prefix(source: Any, size: int = SNIFF_BYTES) -> bytes:
+    # Só o começo do arquivo; arquivos abertos voltam para a posição original
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(memoryview(source)[:size])
+    if _is_path(source):
+        with open(source, 'rb') as f:
+            return f.read(size)
+    position = source.tell()
+    prefix = source.read(size)
+    source.seek(position)
+    return prefix if isinstance(prefix, bytes) else prefix.encode('utf-8')
+
+
+def detect_encoding(prefix: bytes, default: str = 'utf-8') -> str:
+    if prefix.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    if prefix.isascii():
+        # Nada a decidir no trecho: fica a codificação padrão da distribuidora
+        return default
+    try:
+        # Decodificador incremental: um caractere cortado no fim do trecho não é erro
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        # Não é UTF-8: exportação do Excel em português/espanhol
+        return 'latin1'
+    return 'utf-8'
+
+
+def _lines(prefix: bytes, encoding: str) -> List[str]:
+    text = prefix.decode(encoding, errors='replace')
+    lines = text.splitlines()
+    # A última linha pode ter sido cortada no meio
+    return lines[:-1] if len(lines) > 1 and not text.endswith(('\n', '\r')) else lines
+
+
+def detect_delimiter(lines: List[str], default: str = ',') -> str:
+    # O delimitador que dá o mesmo número de campos (> 1) no maior número de linhas
+    best, best_score = default, 0
+    for delimiter in DELIMITERS:
+        rows = list(csv.reader(lines, delimiter=delimiter))
+        if not rows or len(rows[0]) < 2:
+            continue
+        width = len(rows[0])
+        score = sum(len(row) == width for row in rows)
+        if score > best_score:
+            best, best_score = delimiter, score
+    return best
+
+
+def detect_decimal(rows: List[List[str]], sep: str, default: str = '.') -> str:
+    if sep == ',':
+        return '.'
+    comma = dot = 0
+    for row in rows:
+        for value in row:
+            value = value.strip()
+            if COMMA_DECIMAL.match(value):
+                comma += 1
+            elif DOT_DECIMAL.match(value):
+                dot += 1
+    if comma == dot:
+        return default
+    return ',' if comma > dot else '.'
+
+
+def sniff(source: Any, default: CsvDialect = CsvDialect()) -> CsvDialect:
+    # Codificação, delimitador e separador decimal a partir do trecho inicial,
+    # antes de qualquer leitura completa
+    prefix = read_prefix(source)
+    encoding = detect_encoding(prefix, default.encoding)
+    lines = _lines(prefix, encoding)
+    sep = detect_delimiter(lines, default.sep)
+    rows = list(csv.reader(lines, delimiter=sep))
+    decimal = detect_decimal(rows[1:], sep, default.decimal)
+
+    if decimal == default.decimal:
+        thousands = default.thousands
+    else:
+        thousands = '.' if decimal == ',' else None
+
+    return replace(
+        default, encoding=encoding, sep=sep, decimal=decimal, thousands=thousands,
+        header=tuple(rows[0]) if rows else ()
+    )
+
+
+def csv_source(source: Any) -> Tuple[Any, dict]:
+    # O que passar ao read_csv sem copiar o conteúdo: caminhos são mapeados
+    # em memória; bytes viram um BytesIO que compartilha o mesmo buffer
+    if _is_path(source):
+        return os.fspath(source), {'memory_map': True}
+    if isinstance(source, memoryview) and isinstance(source.obj, bytes) and source.nbytes == len(source.obj):
+        source = source.obj
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return BytesIO(source), {}
+    return source, {}
+
+
+def read_csv(source: Any, dialect: CsvDialect, required: Iterable[str] = (), **kwargs) -> pd.DataFrame:
+    # Falha logo se o cabeçalho não tem as colunas esperadas, sem ler o arquivo inteiro
+    missing = dialect.missing(required)
+    if missing:
+        raise ValueError(
+            f"Colunas não encontradas: {', '.join(missing)} "
+            f"(delimitador {dialect.sep!r}, codificação {dialect.encoding})"
+        )
+    source, extra = csv_source(source)
+    return pd.read_csv(source, **dialect.read_kwargs(), **extra, **kwargs)
+
+
+def to_number(values: pd.Series, dialect: CsvDialect) -> pd.Series:
+    # Texto lido com dtype=str para número, respeitando o separador decimal
+    if dialect.thousands:
+        values = values.str.replace(dialect.thousands, '', regex=False)
+    if dialect.decimal != '.':
+        values = values.str.replace(dialect.decimal, '.', regex=False)
+    return pd.to_numeric(values, errors='coerce')
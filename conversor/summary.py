@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+from typing import Dict
+
+import pandas as pd
+
+from conversor.dates import format_dates
+from conversor.result import apply_tax
+
+DIMENSIONS = ['label', 'territory', 'store', 'month']
+
+
+def _month_keys(keys: pd.Index) -> pd.Index:
+    # Normaliza as chaves de data para 'AAAA-MM' (são poucos valores distintos);
+    # o que não for data fica como está
+    keys = pd.Series(keys)
+    months = format_dates(keys, '%Y-%m', errors='coerce')
+    return pd.Index(months.fillna(keys.astype(str)))
+
+
+@dataclass
+class RoyaltySummary:
+    # Resumo pré-agregado dos valores brutos. Como o imposto é um fator
+    # linear, o líquido de qualquer taxa sai daqui em tempo constante.
+    total_gross: float = 0.0
+    rows: int = 0
+    groups: Dict[str, pd.Series] = field(default_factory=dict)
+
+    def add(self, df: pd.DataFrame, value_column: str, dimensions: Dict[str, str]) -> 'RoyaltySummary':
+        values = pd.to_numeric(df[value_column], errors='coerce')
+        self.total_gross += float(values.sum())
+        self.rows += len(df)
+
+        for name, column in dimensions.items():
+            if column not in df.columns:
+                continue
+            sums = values.groupby(df[column], dropna=False, observed=True).sum()
+            if name == 'month':
+                sums = sums.groupby(_month_keys(sums.index), dropna=False).sum()
+            if name in self.groups:
+                sums = self.groups[name].add(sums, fill_value=0)
+            self.groups[name] = sums
+
+        return self
+
+    def total_net(self, tax_rate: float) -> float:
+        return apply_tax(self.total_gross, tax_rate)
+
+    def table(self, dimension: str, tax_rate: float) -> pd.DataFrame:
+        gross = self.groups[dimension].sort_values(ascending=False)
+        return pd.DataFrame({
+            dimension: gross.index,
+            'Gross': gross.to_numpy(),
+            'Net': apply_tax(gross, tax_rate).to_numpy(),
+        })
+
+
+def summarize(df: pd.DataFrame, value_column: str, dimensions: Dict[str, str]) -> RoyaltySummary:
+    return RoyaltySummary().add(df, value_column, dimensions)
@@ -0,0 +1,132 @@
+import os
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from conversor import columnar
+from conversor.backoffice import ROYALTIES_COLUMN
+from conversor.cache import ValueCache, content_key
+from conversor.ingest import parallel_map
+from conversor.instrumentation import stage
+
+# Linhas percorridas procurando o cabeçalho
+HEADER_SEARCH_ROWS = 20
+
+_MISSING = object()
+
+
+@dataclass
+class FileTotal:
+    name: str
+    total: Optional[float] = None
+    error: Optional[str] = None
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _sum_values(values) -> float:
+    return float(pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').sum())
+
+
+def _xlsx_column_total(data: bytes, column: str) -> Optional[float]:
+    # openpyxl em modo read-only: acha a linha do cabeçalho e percorre só a
+    # coluna pedida, sem montar o DataFrame
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0]
+        header_row = position = None
+        for number, row in enumerate(worksheet.iter_rows(max_row=HEADER_SEARCH_ROWS, values_only=True), start=1):
+            if column in row:
+                header_row, position = number, row.index(column) + 1
+                break
+        if header_row is None:
+            return None
+
+        values = [
+            value for (value,) in worksheet.iter_rows(
+                min_row=header_row + 1, min_col=position, max_col=position, values_only=True
+            )
+        ]
+    finally:
+        workbook.close()
+
+    return _sum_values(values)
+
+
+def _excel_column_total(data: bytes, column: str) -> Optional[float]:
+    # .xls e outros formatos do read_excel: cabeçalho primeiro, depois só a coluna
+    head = pd.read_excel(BytesIO(data), header=None, nrows=HEADER_SEARCH_ROWS)
+    matches = head.index[(head == column).any(axis=1)]
+    if len(matches) == 0:
+        return None
+    values = pd.read_excel(BytesIO(data), header=int(matches[0]), usecols=[column])[column]
+    return _sum_values(values)
+
+
+def column_total(name: str, data: bytes, column: str = ROYALTIES_COLUMN) -> Optional[float]:
+    # Soma de uma coluna do arquivo, ou None se a coluna não existir
+    fmt = columnar.format_for(name)
+    if fmt is not None:
+        df = columnar.read_columnar(data, fmt)
+        return _sum_values(df[column]) if column in df.columns else None
+    if name.lower().endswith('.xlsx'):
+        return _xlsx_column_total(data, column)
+    return _excel_column_total(data, column)
+
+
+def compute_totals(
+    files: Iterable[Tuple[str, bytes]],
+    column: str = ROYALTIES_COLUMN,
+    max_workers: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int, FileTotal], None]] = None,
+    cache: Optional[ValueCache] = None
+) -> List[FileTotal]:
+    # Soma a coluna de cada arquivo em paralelo; o total de cada arquivo
+    # fica em cache pelo hash do conteúdo
+    files = list(files)
+    total = len(files)
+    results: List[Optional[FileTotal]] = [None] * total
+    keys = [content_key(data, 'total', column) for _, data in files]
+    done = 0
+
+    def finish(i, result):
+        nonlocal done
+        results[i] = result
+        done += 1
+        if on_progress:
+            on_progress(done, total, result)
+
+    with stage('totals', rows=total):
+        pending = []
+        for i, (name, _) in enumerate(files):
+            value = cache.get(keys[i], _MISSING) if cache is not None else _MISSING
+            if value is _MISSING:
+                pending.append(i)
+            else:
+                finish(i, FileTotal(name, value, cached=True))
+
+        def finish_pending(j, value, error):
+            i = pending[j]
+            name = files[i][0]
+            if error is not None:
+                finish(i, FileTotal(name, error=str(error)))
+                return
+            if cache is not None:
+                cache.put(keys[i], value)
+            finish(i, FileTotal(name, value))
+
+        parallel_map(
+            column_total,
+            [(os.path.basename(files[i][0]), files[i][1], column) for i in pending],
+            max_workers,
+            finish_pending
+        )
+
+    return results
@@ -0,0 +1,85 @@
+from typing import Any, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Limite de linhas de uma aba do Excel (inclui o cabeçalho)
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def _values(chunk: pd.DataFrame) -> pd.DataFrame:
+    # Células vazias viram None (não são gravadas). O Excel não tem ±inf:
+    # como no pd.ExcelWriter, vão como o texto 'inf' / '-inf'
+    values = chunk.astype(object).where(chunk.notna(), None)
+    for column in chunk.columns:
+        if not pd.api.types.is_float_dtype(chunk[column]):
+            continue
+        numbers = chunk[column].to_numpy(dtype=float, na_value=np.nan)
+        infinite = np.isinf(numbers)
+        if infinite.any():
+            values.loc[infinite, column] = np.where(numbers[infinite] > 0, 'inf', '-inf')
+    return values
+
+
+def write_xlsx_streaming(frames: Union[pd.DataFrame, Iterable[pd.DataFrame]], target: Any,
+                         columns: Optional[List[str]] = None, sheet_prefix: str = 'Sheet',
+                         max_rows: int = EXCEL_MAX_ROWS) -> int:
+    # Grava as linhas em modo constant_memory do xlsxwriter: cada linha vai
+    # para um arquivo temporário em disco assim que é escrita, então nunca
+    # existe uma cópia da planilha inteira em memória. Ao passar do limite de
+    # linhas, continua numa nova aba (Sheet1, Sheet2, ...). Devolve o número
+    # de abas gravadas.
+    import xlsxwriter
+
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    frames = iter(frames)
+
+    first = next(frames, None)
+    if columns is None:
+        columns = list(first.columns) if first is not None else []
+
+    # nan_inf_to_errors: um ±inf que sobrar (ex.: coluna object) vira um erro do Excel
+    # em vez de derrubar a gravação inteira
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True, 'nan_inf_to_errors': True})
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+
+    sheets = 0
+    worksheet = None
+    row = max_rows
+
+    def new_sheet():
+        nonlocal sheets
+        sheets += 1
+        sheet = workbook.add_worksheet(f'{sheet_prefix}{sheets}')
+        sheet.write_row(0, 0, [str(column) for column in columns], header_format)
+        return sheet
+
+    try:
+        chunk = first
+        while chunk is not None:
+            chunk = chunk.reindex(columns=columns)
+            formats = [
+                date_format if pd.api.types.is_datetime64_any_dtype(chunk[column]) else None
+                for column in columns
+            ]
+            values = _values(chunk)
+
+            for record in values.itertuples(index=False, name=None):
+                if row >= max_rows:
+                    worksheet = new_sheet()
+                    row = 1
+                for col, value in enumerate(record):
+                    if value is not None:
+                        worksheet.write(row, col, value, formats[col])
+                row += 1
+
+            chunk = next(frames, None)
+
+        if worksheet is None:
+            new_sheet()
+    finally:
+        workbook.close()
+
+    return sheets
@@ -1,13 +1,16 @@
-import pandas as pd
+import os
+import tempfile
+
 import streamlit as st
 
-# Inicialização do estado da sessão
-if 'processed_df' not in st.session_state:
-    st.session_state.processed_df = None
-if 'total_royalty' not in st.session_state:
-    st.session_state.total_royalty = 0
-if 'total_royalty_gross' not in st.session_state:
-    st.session_state.total_royalty_gross = 0
+from conversor.cache import content_key, parse_cache
+from conversor.detect import FUGA
+from conversor.fuga import FUGA_TAX_RATE, prepare_fuga, prepare_fuga_chunked, read_fuga
+from conversor.jobs import track_file
+from ui.batch import batch_section
+from ui.instrumentation import instrumentation_panel, record_page, stage_log
+from ui.jobs import rerun_while_running
+from ui.statement import prepare_statement, statement_section
 
 st.title('FUGA Conversor')
 
@@ -15,53 +18,59 @@ tax_rate = st.number_input(
     'Taxa de imposto (%)',
     min_value=0.0,
     max_value=100.0,
-    value=18.5,
+    value=FUGA_TAX_RATE,
     step=0.1
 )
 
-def process_fuga_statement(file, tax_rate):
+streaming = st.checkbox(
+    'Modo streaming (arquivos grandes)',
+    help='Lê o CSV em blocos e grava o resultado direto em disco, sem carregar o arquivo inteiro na memória.'
+)
+
+def prepare_fuga_data(data, streaming, key):
+    # Roda em segundo plano: nada de Streamlit aqui
+    if streaming:
+        return prepare_fuga_to_file(data)
+    # O CSV lido fica em cache
+    df = parse_cache.get_or_parse(data, lambda: read_fuga(data), 'fuga')
+    return prepare_fuga(df, key=key), None
+
+def prepare_fuga_to_file(data):
+    fd, path = tempfile.mkstemp(prefix='fuga_', suffix='.csv')
     try:
-        df = pd.read_csv(file, sep=',', decimal='.')
-        filtered_df = df[df['Product Label'].isin(['Elemess', 'Elemess Label Services'])]
-        
-        st.session_state.total_royalty_gross = filtered_df['Reported Royalty'].sum()
-        filtered_df['Reported Royalty'] = filtered_df['Reported Royalty'] * (1 - tax_rate / 100)
-        st.session_state.total_royalty = filtered_df['Reported Royalty'].sum()
-        
-        return filtered_df
-    except Exception as e:
-        st.error(f'Erro ao processar arquivo: {str(e)}')
-        return None
+        # Lê em blocos e grava as linhas filtradas (valores brutos) em disco
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as output:
+            prepared = prepare_fuga_chunked(data, output)
+    except Exception:
+        os.remove(path)
+        raise
 
-uploaded_file = st.file_uploader('Upload statement', type=['csv'])
+    # O arquivo é apagado junto com o resultado do trabalho
+    track_file(path)
+    return prepared, path
 
-if uploaded_file:
+uploaded_files = st.file_uploader('Upload statement', type=['csv'], accept_multiple_files=True)
+uploaded_file = uploaded_files[0] if len(uploaded_files) == 1 else None
+
+record_page('FUGA')
+if len(uploaded_files) > 1:
+    # Vários extratos: processados em paralelo, com um único download
+    if streaming:
+        st.caption('O modo streaming vale para um extrato por vez; o lote é processado em memória.')
+    batch_section(FUGA, uploaded_files, tax_rate)
+elif uploaded_file:
     try:
-        st.session_state.processed_df = process_fuga_statement(uploaded_file, tax_rate)
-        
-        if st.session_state.processed_df is not None:
-            st.info(f'⚠️ Mostrando dados processados com desconto de {tax_rate}%')
-            
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                st.metric(
-                    label="Total de Royalties Calculados",
-                    value=f"{st.session_state.total_royalty_gross:,.2f}"
-                )
-            with col2:
-                st.metric(
-                    label="Total de Royalties com desconto",
-                    value=f"{st.session_state.total_royalty:,.2f}"
-                )
-            
-            st.dataframe(st.session_state.processed_df)
-            
-            csv = st.session_state.processed_df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Download CSV processado",
-                data=csv,
-                file_name="processed_statement.csv",
-                mime="text/csv"
-            )
+        data = uploaded_file.getvalue()
+        key = content_key(data, 'fuga', streaming)
+        result = prepare_statement(FUGA, 'FUGA', key, prepare_fuga_data, data, streaming, key)
+        if result is not None:
+            prepared, processed_path = result
+            statement_section(FUGA, prepared, tax_rate, 'processed_statement', processed_path)
     except Exception as e:
-        st.error(f"Erro ao carregar o arquivo: {e}")
\ No newline at end of file
+        st.error(f"Erro ao carregar o arquivo: {e}")
+
+instrumentation_panel(stage_log())
+
+st.sidebar.caption(parse_cache.summary())
+
+rerun_while_running()
\ No newline at end of file
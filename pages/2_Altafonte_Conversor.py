@@ -1,13 +1,13 @@
-import pandas as pd 
 import streamlit as st
 from datetime import datetime
 
-if 'processed_df' not in st.session_state:
-    st.session_state.processed_df = None
-if 'total_royalty' not in st.session_state:
-    st.session_state.total_royalty = 0
-if 'total_royalty_gross' not in st.session_state:
-    st.session_state.total_royalty_gross = 0
+from conversor.altafonte import ALTAFONTE_TAX_RATE, prepare_altafonte, read_altafonte
+from conversor.cache import content_key, parse_cache
+from conversor.detect import ALTAFONTE
+from ui.batch import batch_section
+from ui.instrumentation import instrumentation_panel, record_page, stage_log
+from ui.jobs import rerun_while_running
+from ui.statement import prepare_statement, statement_section
 
 st.title('Altafonte Conversor')
 
@@ -15,66 +15,37 @@ tax_rate = st.number_input(
     'Taxa de imposto (%)',
     min_value=0.0,
     max_value=100.0,
-    value=28.5,
+    value=ALTAFONTE_TAX_RATE,
     step=0.1
 )
 
-def calculate_total(df, column):
-    return df[column].sum()
+def prepare_altafonte_data(data, key):
+    # Roda em segundo plano: nada de Streamlit aqui. O CSV lido fica em cache
+    df = parse_cache.get_or_parse(data, lambda: read_altafonte(data), 'altafonte')
+    return prepare_altafonte(df, key=key)
 
-def clean_ean(ean):
-    # Remove Excel formula formatting
-    return ean.strip('=()""')
+uploaded_files = st.file_uploader('Upload statement', type=['csv'], accept_multiple_files=True)
+uploaded_file = uploaded_files[0] if len(uploaded_files) == 1 else None
 
-def process_altafonte_statement(file, tax_rate):
+record_page('Altafonte')
+if len(uploaded_files) > 1:
+    # Vários extratos: processados em paralelo, com um único download
+    batch_section(ALTAFONTE, uploaded_files, tax_rate)
+elif uploaded_file:
     try:
-        df = pd.read_csv(file, sep=';', decimal=',', thousands='.', encoding='latin1')
-        filtered_df = df[df['SELLO'].isin(['Elemess'])].copy()
-        
-        filtered_df['EAN'] = filtered_df['EAN'].apply(clean_ean)
-        
-        st.session_state.total_royalty_gross = calculate_total(filtered_df, 'NET')
-        filtered_df['NET'] = filtered_df['NET'] * (1 - tax_rate / 100)
-        st.session_state.total_royalty = calculate_total(filtered_df, 'NET')
-        
-        for col in ['BRUTO', 'NET', 'CPM']:
-            filtered_df[col] = filtered_df[col].apply(lambda x: f"{x:,.6f}".replace(",", "@").replace(".", ",").replace("@", "."))
-        
-        return filtered_df
-    except Exception as e:
-        st.error(f'Erro ao processar arquivo: {str(e)}')
-        return None
-
-uploaded_file = st.file_uploader('Upload statement', type=['csv'])
-
-if uploaded_file:
-    try:
-        st.session_state.processed_df = process_altafonte_statement(uploaded_file, tax_rate)
-        
-        if st.session_state.processed_df is not None:
-            st.info(f'⚠️ Mostrando dados processados com desconto de {tax_rate}%')
-            
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                st.metric(
-                    label="Total de Royalties Gross",
-                    value=f"R$ {st.session_state.total_royalty_gross:,.2f}"
-                )
-            with col2:
-                st.metric(
-                    label="Total de Royalties com desconto",
-                    value=f"R$ {st.session_state.total_royalty:,.2f}"
-                )
-            
-            st.dataframe(st.session_state.processed_df)
-            
+        data = uploaded_file.getvalue()
+        key = content_key(data, 'altafonte')
+        prepared = prepare_statement(ALTAFONTE, 'Altafonte', key, prepare_altafonte_data, data, key)
+        if prepared is not None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            csv = st.session_state.processed_df.to_csv(index=False, sep=',', encoding='latin1').encode('UTF-8')
-            st.download_button(
-                label="Download CSV processado",
-                data=csv,
-                file_name=f"processed_statement_{timestamp}.csv",
-                mime="text/csv"
+            statement_section(
+                ALTAFONTE, prepared, tax_rate, f"processed_statement_{timestamp}", currency='R$ '
             )
     except Exception as e:
-        st.error(f"Erro ao carregar o arquivo: {e}")
\ No newline at end of file
+        st.error(f"Erro ao carregar o arquivo: {e}")
+
+instrumentation_panel(stage_log())
+
+st.sidebar.caption(parse_cache.summary())
+
+rerun_while_running()
\ No newline at end of file
@@ -1,39 +1,157 @@
 import streamlit as st
 import pandas as pd
 import os
-from io import BytesIO
+import tempfile
 import warnings
 
+from conversor import columnar
+from conversor.backoffice import (
+    TOTALS_COLUMN, align_workbooks, concat_workbooks, drift_table, is_statement_file, iter_muma, totals_table,
+    union_columns, write_xlsx
+)
+from conversor.cache import parse_cache, totals_cache
+from conversor.formatting import format_currency_br
+from conversor.ingest import read_workbooks
+from conversor.jobs import report, track_file
+from conversor.totals import compute_totals
+from ui.instrumentation import instrumentation_panel, record_page, stage_log
+from ui.jobs import job_status, rerun_while_running, slot_job, submit_job
+
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 pd.set_option('display.max_colwidth', None)
 
-# Column mapping dictionary
-MUMA_MAPPING = {
-    'BO_PayeesID': 'Member Reference',
-    'Payee_Name': 'Member Name',
-    'Publisher': 'PUBLISHER',
-    'Country_Of_Sale': 'Territory',
-    'StartDate': 'Date From (MM/YYYY)',
-    'EndDate': 'Date To (MM/YYYY)',
-    'BO_SongCode': 'BO_SONGCODE',
-    'Publishers_SongCode': 'PUBLISHERS_SONGCODE',
-    'Song_Title': 'Song Title',
-    'Song_Owners': 'Song Composer(s)',
-    'Performer': 'Artist',
-    'Customer': 'CUSTOMER',
-    'ISWC': 'ISWC',
-    'ISRC': 'ISRC',
-    'Currency': 'CURRENCY',
-    'Format': 'Instrumental or Vocal Use',
-    'Total_Units': 'Units',
-    'ROYATIES_GROSS_$': 'ROYATIES_GROSS_$',
-    'ADMIN_FEE_$': 'ADMIN_FEE_$',
-    'ROYALTIES_TO_BE_PAID': 'Amount',
-    'Source': 'Source of Income',
-    'Statement_Period_#': 'STATEMENT_PERIOD_#',
-    'Statement_Period': 'STATEMENT_PERIOD',
-    'Payee_Statement_#': 'PAYEE_STATEMENT_#'
-}
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def report_progress(done, total, result):
+    report(done / total, f"{done}/{total} - {result.name}")
+
+def load_workbooks(files):
+    # Lê os arquivos em paralelo e alinha ao esquema Backoffice. Roda em
+    # segundo plano: nada de Streamlit aqui, os erros voltam no resultado
+    results = read_workbooks(files, on_progress=report_progress, cache=parse_cache)
+    loaded = [result for result in results if result.ok]
+    dataframes, drifts = align_workbooks(
+        [result.df for result in loaded], [result.name for result in loaded]
+    )
+    errors = [(result.name, result.error) for result in results if not result.ok]
+    return dataframes, drift_table(drifts), errors
+
+def output_path(suffix):
+    # Saída em disco, apagada junto com o resultado do trabalho
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    track_file(path)
+    return path
+
+def concat_files(files, concat_format):
+    dataframes, drifts, errors = load_workbooks(files)
+    columns = union_columns(dataframes)
+
+    if concat_format == 'xlsx':
+        # Grava arquivo a arquivo, sem montar o concatenado em memória
+        path = output_path('.xlsx')
+        sheets = write_xlsx(dataframes, path, columns=columns)
+    else:
+        path = output_path(columnar.extension(concat_format))
+        columnar.write_columnar(concat_workbooks(dataframes), path, concat_format)
+        sheets = None
+
+    return {
+        'files': len(dataframes), 'rows': sum(len(df) for df in dataframes), 'columns': len(columns),
+        'path': path, 'sheets': sheets, 'drifts': drifts, 'errors': errors
+    }
+
+def muma_files(files):
+    dataframes, drifts, errors = load_workbooks(files)
+
+    # Converte as datas para MM/YYYY e renomeia as colunas conforme o
+    # mapping, arquivo a arquivo, gravando direto na planilha
+    path = output_path('.xlsx')
+    sheets = write_xlsx(iter_muma(dataframes), path)
+
+    return {
+        'files': len(dataframes), 'rows': sum(len(df) for df in dataframes),
+        'columns': len(union_columns(dataframes)),
+        'path': path, 'sheets': sheets, 'drifts': drifts, 'errors': errors
+    }
+
+def total_files(files):
+    # Lê só a coluna de royalties dos arquivos ST, em paralelo
+    results = compute_totals(files, on_progress=report_progress, cache=totals_cache)
+    return {'totals': results}
+
+def show_load_messages(output):
+    for name, error in output['errors']:
+        st.warning(f"Erro ao ler {name}: {error}")
+
+    drifts = output['drifts']
+    if not drifts.empty:
+        with st.expander(f"⚠️ {len(drifts)} arquivo(s) fora do esquema Backoffice"):
+            st.dataframe(drifts)
+
+def download_file(output, label, file_name, mime):
+    if output['sheets'] and output['sheets'] > 1:
+        st.info(f"O resultado passou do limite de linhas do Excel e foi dividido em {output['sheets']} abas.")
+    # O download recebe o arquivo aberto, não uma cópia em bytes
+    with open(output['path'], 'rb') as data:
+        st.download_button(label=label, data=data, file_name=file_name, mime=mime)
+
+def show_concat(output, concat_format):
+    show_load_messages(output)
+
+    # Informações sobre o resultado
+    st.success(f"""
+    Concatenação concluída com sucesso!
+    - Total de arquivos: {output['files']}
+    - Total de linhas: {output['rows']}
+    - Total de colunas: {output['columns']}
+    """)
+
+    if concat_format == 'xlsx':
+        download_file(output, "📥 Baixar arquivo concatenado", "arquivos_concatenados.xlsx", XLSX_MIME)
+    else:
+        download_file(
+            output, "📥 Baixar arquivo concatenado",
+            "arquivos_concatenados" + columnar.extension(concat_format), columnar.mime(concat_format)
+        )
+
+def show_totals(output):
+    results = []
+    for result in output['totals']:
+        if not result.ok:
+            st.warning(f"Erro ao ler {result.name}: {result.error}")
+        elif result.total is not None:
+            results.append((result.name, result.total))
+        else:
+            st.warning(f"A coluna 'ROYALTIES_TO_BE_PAID' não foi encontrada em {result.name}")
+
+    if results:
+        # Tabela com os totais por arquivo e a linha de total geral
+        df_results = totals_table(results)
+        total_royalties_sum = df_results[TOTALS_COLUMN].iloc[-1]
+
+        # Formata como moeda brasileira
+        df_results[TOTALS_COLUMN] = format_currency_br(df_results[TOTALS_COLUMN])
+
+        # Exibe o DataFrame
+        st.dataframe(df_results)
+
+        st.write(f'Total: **{total_royalties_sum}**')
+
+    else:
+        st.warning("Nenhum arquivo válido para totalização encontrado.")
+
+def show_muma(output):
+    show_load_messages(output)
+
+    # Informações sobre o resultado
+    st.success(f"""
+    Planilha MuMa gerada com sucesso!
+    - Total de linhas: {output['rows']}
+    - Total de colunas: {output['columns']}
+    """)
+
+    download_file(output, "📥 Baixar planilha MuMa", "planilha_muma.xlsx", XLSX_MIME)
 
 #----------------------------------
 # Concat & Totalize Files
@@ -42,160 +160,63 @@ st.title("Concat Backoffice")
 st.caption("Concatena e totaliza os arquivos Backoffice para conferência e inclusão no Reprtoir.")
     
 # Upload dos arquivos
-uploaded_files = st.file_uploader("Faça o upload dos arquivos Excel", 
-                                type=['xlsx', 'xls'], 
+uploaded_files = st.file_uploader("Faça o upload dos arquivos Excel (ou Parquet/Arrow exportados)", 
+                                type=['xlsx', 'xls', 'parquet', 'arrow', 'feather'], 
                                 accept_multiple_files=True,
                                 key="concat_files",
                                )
 
+record_page('Backoffice')
 if uploaded_files:
     # Botões para escolher a ação
     col1, col2, col3 = st.columns(3)
-    
+
     with col1:
         concat_button = st.button('Concatenar arquivos', type='secondary')
     with col2:
         totals_button = st.button('Calcular totais', type='primary')
     with col3:
         muma_button = st.button('Gerar planilha MuMa', type='secondary')
-    
+
+    concat_format = st.selectbox(
+        'Formato do arquivo concatenado',
+        ['xlsx'] + columnar.available_formats(),
+        help='Parquet/Arrow podem ser enviados de volta aqui, sem reler o Excel'
+    )
+
+    files = [(file.name, file.getvalue()) for file in uploaded_files]
+
+    # As ações rodam em segundo plano; o último resultado fica na sessão
+    # e sobrevive a reruns e à troca de página
     if concat_button:
-        try:
-            # Lista para armazenar os DataFrames
-            dataframes = []
-            
-            # Processamento com barra de progresso
-            progress_bar = st.progress(0)
-            for i, file in enumerate(uploaded_files):
-                progress = (i + 1) / len(uploaded_files)
-                progress_bar.progress(progress)
-                
-                # Lê o arquivo e adiciona ao DataFrame
-                df = pd.read_excel(file)
-                dataframes.append(df)
-                            
-            # Concatena todos os DataFrames
-            concatenated_df = pd.concat(dataframes, ignore_index=True)
-            
-            # Informações sobre o resultado
-            st.success(f"""
-            Concatenação concluída com sucesso!
-            - Total de arquivos: {len(dataframes)}
-            - Total de linhas: {len(concatenated_df)}
-            - Total de colunas: {len(concatenated_df.columns)}
-            """)
-            
-            # Prepara o arquivo para download
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                concatenated_df.to_excel(writer, index=False)
-            
-            # Botão de download
-            st.download_button(
-                label="📥 Baixar arquivo concatenado",
-                data=buffer.getvalue(),
-                file_name="arquivos_concatenados.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-            
-        except Exception as e:
-            st.error(f"Erro ao concatenar os arquivos: {str(e)}")
-    
+        submit_job('backoffice', 'Concatenação', concat_files, files, concat_format)
+        st.session_state.backoffice_action = ('concat', concat_format)
     if totals_button:
-        try:
-            # Lista para armazenar os resultados
-            results = []
-            
-            # Processamento com barra de progresso
-            progress_bar = st.progress(0)
-            for i, file in enumerate(uploaded_files):
-                progress = (i + 1) / len(uploaded_files)
-                progress_bar.progress(progress)
-                
-                # Leitura do arquivo Excel
-                if "ST" in file.name.upper():
-                    df = pd.read_excel(file)
-                    
-                    if "ROYALTIES_TO_BE_PAID" in df.columns:
-                        total_royalties = df["ROYALTIES_TO_BE_PAID"].sum()
-                        results.append((file.name, total_royalties))
-                    else:
-                        st.warning(f"A coluna 'ROYALTIES_TO_BE_PAID' não foi encontrada em {file.name}")
-
-            if results:
-                # Cria o DataFrame com os resultados
-                df_results = pd.DataFrame(results, columns=["Arquivo", "Soma de ROYALTIES_TO_BE_PAID"])
-
-                # Arredonda os valores para duas casas decimais
-                df_results["Soma de ROYALTIES_TO_BE_PAID"] = df_results["Soma de ROYALTIES_TO_BE_PAID"].round(2)
-
-                # Adiciona uma linha com a soma total
-                total_royalties_sum = df_results["Soma de ROYALTIES_TO_BE_PAID"].sum().round(2)
-                df_results.loc[len(df_results.index)] = ["Total", total_royalties_sum]
-
-                # Formata como moeda brasileira
-                df_results["Soma de ROYALTIES_TO_BE_PAID"] = df_results["Soma de ROYALTIES_TO_BE_PAID"].apply(
-                    lambda x: f"R${x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                )
-
-                # Exibe o DataFrame
-                st.dataframe(df_results)
-
-                st.write(f'Total: **{total_royalties_sum}**')
-                
-            else:
-                st.warning("Nenhum arquivo válido para totalização encontrado.")
-
-        except Exception as e:
-            st.error(f"Erro ao processar os totais: {str(e)}")
-            
+        st_files = [(name, data) for name, data in files if is_statement_file(name)]
+        submit_job('backoffice', 'Totais', total_files, st_files)
+        st.session_state.backoffice_action = ('totals', None)
     if muma_button:
+        submit_job('backoffice', 'Planilha MuMa', muma_files, files)
+        st.session_state.backoffice_action = ('muma', None)
+
+    job = job_status(slot_job('backoffice'))
+    if job is not None:
+        action, action_format = st.session_state.backoffice_action
         try:
-            # Lista para armazenar os DataFrames
-            dataframes = []
-            
-            # Processamento com barra de progresso
-            progress_bar = st.progress(0)
-            for i, file in enumerate(uploaded_files):
-                progress = (i + 1) / len(uploaded_files)
-                progress_bar.progress(progress)
-                
-                # Lê o arquivo e adiciona ao DataFrame
-                df = pd.read_excel(file)
-                dataframes.append(df)
-                            
-            # Concatena todos os DataFrames
-            df = pd.concat(dataframes, ignore_index=True)
-            
-            # Converte as datas para o formato MM/YYYY
-            df['StartDate'] = pd.to_datetime(df['StartDate'], dayfirst=True).dt.strftime('%m/%Y')
-            df['EndDate'] = pd.to_datetime(df['EndDate'], dayfirst=True).dt.strftime('%m/%Y')
-            
-            # Renomeia as colunas conforme o mapping
-            df_muma = df.rename(columns=MUMA_MAPPING)
-            
-            # Prepara o arquivo para download
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                df_muma.to_excel(writer, index=False)
-            
-            # Informações sobre o resultado
-            st.success(f"""
-            Planilha MuMa gerada com sucesso!
-            - Total de linhas: {len(df_muma)}
-            - Total de colunas: {len(df_muma.columns)}
-            """)
-            
-            # Botão de download
-            st.download_button(
-                label="📥 Baixar planilha MuMa",
-                data=buffer.getvalue(),
-                file_name="planilha_muma.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-            
+            if action == 'concat':
+                show_concat(job.result, action_format)
+            elif action == 'totals':
+                show_totals(job.result)
+            else:
+                show_muma(job.result)
         except Exception as e:
-            st.error(f"Erro ao gerar planilha MuMa: {str(e)}")
+            st.error(f"Erro ao exibir o resultado: {str(e)}")
 
 else:
     st.info("Aguardando upload dos arquivos...")
+
+instrumentation_panel(stage_log())
+
+st.sidebar.caption(parse_cache.summary())
+
+rerun_while_running()
\ No newline at end of file
@@ -0,0 +1,119 @@
+import streamlit as st
+import os
+import tempfile
+
+from conversor.cache import content_key
+from conversor.detect import ALTAFONTE, FUGA, ONERPM
+from conversor.formatting import format_currency_br
+from conversor.jobs import report, track_file
+from conversor.reconcile import DEFAULT_KEYS, TOLERANCE, common_keys, reconcile
+from ui.instrumentation import instrumentation_panel, record_page, stage_log
+from ui.jobs import find_job, job_status, rerun_while_running, submit_job
+
+DISTRIBUTORS = {'FUGA': FUGA, 'Altafonte': ALTAFONTE, 'ONErpm': ONERPM}
+KEY_LABELS = {'isrc': 'ISRC', 'upc': 'UPC', 'period': 'Período (mês)'}
+
+def reconcile_files(conversor_files, distributor, backoffice_files, keys, tolerance):
+    # Roda em segundo plano: todas as chaves vão para um CSV em disco,
+    # apagado junto com o resultado do trabalho
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    track_file(path)
+    summary, differences = reconcile(
+        [(file, distributor) for file in conversor_files], backoffice_files, keys, tolerance,
+        output=path, on_progress=report
+    )
+    return {'summary': summary, 'differences': differences, 'path': path}
+
+def show_reconcile(output):
+    summary = output['summary']
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(label="Total conversor", value=f"{summary.total_conversor:,.2f}")
+    with col2:
+        st.metric(label="Total Backoffice", value=f"{summary.total_backoffice:,.2f}")
+    with col3:
+        st.metric(label="Diferença", value=f"{summary.difference:,.2f}")
+
+    st.write(f"""
+    - Chaves comparadas: {summary.keys}
+    - Conferem: {summary.matched}
+    - Divergentes: {summary.divergent}
+    - Só no conversor: {summary.only_conversor}
+    - Só no Backoffice: {summary.only_backoffice}
+    """)
+
+    differences = output['differences']
+    if differences.empty:
+        st.success("Todas as chaves conferem.")
+    else:
+        if summary.divergent + summary.only_conversor + summary.only_backoffice > len(differences):
+            st.caption(f"Exibindo as {len(differences)} maiores diferenças; todas estão no CSV.")
+        preview = differences.copy()
+        for column in ['Conversor', 'Backoffice', 'Diferença']:
+            preview[column] = format_currency_br(preview[column])
+        st.dataframe(preview)
+
+    with open(output['path'], 'rb') as data:
+        st.download_button(
+            label="📥 Baixar reconciliação (CSV)",
+            data=data,
+            file_name="reconciliacao.csv",
+            mime="text/csv"
+        )
+
+#----------------------------------
+# Reconciliação
+#----------------------------------
+st.title("Reconciliação")
+st.caption("Compara as saídas dos conversores com os dados Backoffice por ISRC e período.")
+
+distributor_name = st.selectbox('Distribuidora', list(DISTRIBUTORS))
+conversor_files = st.file_uploader("Saídas do conversor (CSV, Parquet ou Arrow)",
+                                   type=['csv', 'parquet', 'arrow', 'feather'],
+                                   accept_multiple_files=True,
+                                   key="reconcile_conversor",
+                                  )
+backoffice_files = st.file_uploader("Arquivos Backoffice (Excel ou o concatenado em Parquet/Arrow)",
+                                    type=['xlsx', 'xls', 'parquet', 'arrow', 'feather'],
+                                    accept_multiple_files=True,
+                                    key="reconcile_backoffice",
+                                   )
+
+record_page('Reconciliação')
+if conversor_files and backoffice_files:
+    # O Backoffice não tem UPC: só as chaves dos dois lados
+    distributor = DISTRIBUTORS[distributor_name]
+    keys = st.multiselect(
+        'Chaves', common_keys(distributor), default=DEFAULT_KEYS, format_func=KEY_LABELS.get
+    )
+    tolerance = st.number_input('Tolerância por chave', min_value=0.0, value=TOLERANCE, step=0.01)
+
+    if not keys:
+        st.warning("Selecione ao menos uma chave.")
+    else:
+        conversor_named = [(file.name, file.getvalue()) for file in conversor_files]
+        backoffice_named = [(file.name, file.getvalue()) for file in backoffice_files]
+        key = content_key(
+            b'', 'reconcile', distributor, tuple(keys), tolerance,
+            tuple(content_key(data) for _, data in conversor_named + backoffice_named)
+        )
+
+        if st.button('Reconciliar', type='primary'):
+            submit_job(
+                'reconcile', 'Reconciliação', reconcile_files,
+                conversor_named, distributor, backoffice_named, keys, tolerance, key=key
+            )
+
+        # Só o resultado destes arquivos e opções
+        job = job_status(find_job('reconcile', key))
+        if job is not None:
+            show_reconcile(job.result)
+
+else:
+    st.info("Aguardando upload dos arquivos...")
+
+instrumentation_panel(stage_log())
+
+rerun_while_running()
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from benchmarks import generators
+from conversor import columnar
+from conversor.detect import ALTAFONTE, FUGA
+from conversor.pipeline import BatchOptions, convert_file
+
+pytest.importorskip('pyarrow')
+
+
+def _convert(tmp_path, data, distributor, fmt):
+    statement = tmp_path / 'statement.csv'
+    statement.write_bytes(data)
+    (tmp_path / 'out').mkdir()
+    options = BatchOptions(output_dir=str(tmp_path / 'out'), output_format=fmt)
+    [report] = convert_file(str(statement), distributor, options)
+    assert report.error is None
+    return columnar.read_columnar(report.output, fmt)
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_altafonte_columnar_keeps_numbers(tmp_path, fmt):
+    # Os números pt-BR ('1.234,56') são só da saída CSV
+    df = _convert(tmp_path, generators.altafonte_csv(500), ALTAFONTE, fmt)
+    for column in ['BRUTO', 'NET', 'CPM']:
+        assert pd.api.types.is_float_dtype(df[column])
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_fuga_streamed_columnar_keeps_numbers(tmp_path, fmt):
+    df = _convert(tmp_path, generators.fuga_csv(500), FUGA, fmt)
+    assert pd.api.types.is_integer_dtype(df['Sale Units'])
+    assert pd.api.types.is_integer_dtype(df['Product UPC'])
+    for column in ['Original Gross Income', 'Converted Gross Income', 'Reported Royalty']:
+        assert pd.api.types.is_float_dtype(df[column])
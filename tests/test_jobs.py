@@ -0,0 +1,29 @@
+import time
+
+from conversor.jobs import DONE, FAILED, JobQueue
+
+
+def _fail():
+    raise ValueError('arquivo inválido')
+
+
+def _wait(job):
+    deadline = time.time() + 10
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_failed_job_is_not_resubmitted_until_forgotten():
+    queue = JobQueue(max_workers=1)
+    job = _wait(queue.submit('Falha', _fail, key='k'))
+    assert job.status == FAILED
+
+    # Rodar a página de novo devolve o mesmo erro, sem processar outra vez
+    assert queue.submit('Falha', _fail, key='k') is job
+    assert len(queue.jobs()) == 1
+
+    queue.forget(job.id)
+    retry = _wait(queue.submit('Sucesso', lambda: 1, key='k'))
+    assert retry is not job
+    assert retry.status == DONE
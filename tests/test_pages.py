@@ -0,0 +1,14 @@
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = ['Home.py'] + sorted(path.relative_to(ROOT).as_posix() for path in (ROOT / 'pages').glob('*.py'))
+
+
+@pytest.mark.parametrize('page', PAGES)
+def test_page_loads(page):
+    # Primeira carga de cada página, sem arquivos: nada pode estourar
+    app = AppTest.from_file(str(ROOT / page), default_timeout=30).run()
+    assert not app.exception
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from benchmarks import generators
+from conversor import altafonte
+from conversor.detect import ALTAFONTE
+from conversor.pipeline import BatchOptions, convert_file
+from conversor.reconcile import reconcile
+from conversor.result import apply_tax
+
+
+def test_reconcile_altafonte_output_against_backoffice(tmp_path):
+    # Converte um extrato, reconcilia a saída com um Backoffice montado do
+    # mesmo extrato e confere os totais
+    data = generators.altafonte_csv(2_000)
+    statement = tmp_path / 'statement.csv'
+    statement.write_bytes(data)
+
+    tax_rate = altafonte.ALTAFONTE_TAX_RATE
+    options = BatchOptions(output_dir=str(tmp_path / 'out'), tax_rates={ALTAFONTE: tax_rate})
+    (tmp_path / 'out').mkdir()
+    [report] = convert_file(str(statement), ALTAFONTE, options)
+    assert report.error is None
+
+    df = altafonte.LABEL_FILTER.apply(altafonte.read_altafonte(data))
+    backoffice = pd.DataFrame({
+        'ISRC': df['ISRC'],
+        'StartDate': pd.to_datetime(df['PERIODO'].astype(str), format='%Y%m').dt.strftime('%m/%Y'),
+        'ROYALTIES_TO_BE_PAID': apply_tax(df['NET'], tax_rate),
+    })
+
+    summary, differences = reconcile([(report.output, ALTAFONTE)], [backoffice])
+
+    assert summary.keys > 0
+    assert summary.total_conversor == pytest.approx(report.total_net, abs=0.01)
+    assert summary.total_backoffice == pytest.approx(report.total_net, abs=0.01)
+    assert summary.matched == summary.keys
+    assert differences.empty
@@ -0,0 +1,22 @@
+from io import BytesIO
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from conversor.xlsx import write_xlsx_streaming
+
+
+def test_infinite_values_are_written_as_text():
+    df = pd.DataFrame({
+        'Royalties': [1.5, np.inf, -np.inf, np.nan],
+        'Misto': [1, np.inf, 'a', 'b'],
+    })
+    buffer = BytesIO()
+    assert write_xlsx_streaming(df, buffer) == 1
+
+    sheet = openpyxl.load_workbook(BytesIO(buffer.getvalue())).active
+    rows = list(sheet.iter_rows(min_row=2, values_only=True))
+    assert [row[0] for row in rows] == [1.5, 'inf', '-inf', None]
+    # Coluna object: o xlsxwriter grava um erro do Excel (=1/0) em vez de falhar
+    assert rows[1][1] == '=1/0'
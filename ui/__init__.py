@@ -0,0 +1 @@
+# Componentes Streamlit compartilhados pelas páginas
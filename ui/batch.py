@@ -0,0 +1,87 @@
+import os
+import tempfile
+
+import streamlit as st
+
+from conversor import columnar
+from conversor.batch import prepare_batch, totals_frame, write_merged, write_zip
+from conversor.cache import content_key
+from conversor.jobs import report, track_file
+from ui.jobs import find_job, job_status, submit_job
+
+MERGED = 'Arquivo único (mesclado)'
+ZIPPED = 'ZIP (um arquivo por extrato)'
+
+
+def _report_progress(done, total, item):
+    report(done / total, f"{done}/{total} - {item.name}")
+
+
+def _build_download(distributor, items, tax_rate, mode, fmt, suffix):
+    # Roda em segundo plano: grava o download em disco, apagado junto com o trabalho
+    extension = '.zip' if mode == ZIPPED else ('.csv' if fmt == 'csv' else columnar.extension(fmt))
+    fd, path = tempfile.mkstemp(suffix=extension)
+    os.close(fd)
+    track_file(path)
+    if mode == ZIPPED:
+        write_zip(distributor, items, tax_rate, path, fmt, suffix)
+    else:
+        write_merged(distributor, items, tax_rate, path, fmt)
+    return path, extension
+
+
+def batch_section(distributor, files, tax_rate, onerpm_report='sales', engine='auto', suffix='_processed'):
+    # Vários extratos de uma vez: primeira passada em paralelo, totais por
+    # arquivo e combinados, e um único download (mesclado ou ZIP)
+    named = [(file.name, file.getvalue()) for file in files]
+    key = content_key(
+        b'', 'batch', distributor, onerpm_report, engine, tuple(content_key(data) for _, data in named)
+    )
+    job = job_status(submit_job(
+        f'{distributor}_batch', f'Lote de {len(named)} extratos', prepare_batch,
+        distributor, named, onerpm_report, engine, on_progress=_report_progress, key=key
+    ))
+    if job is None:
+        return
+
+    items = job.result
+    for item in items:
+        if not item.ok:
+            st.warning(f"Erro ao processar {item.name}: {item.error}")
+    if not any(item.ok for item in items):
+        return
+
+    totals = totals_frame(items, tax_rate)
+    st.info(f'⚠️ {len(totals) - 1} extratos processados com desconto de {tax_rate}%')
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        st.metric(label="Total de Royalties Gross", value=f"{totals['Gross'].iloc[-1]:,.2f}")
+    with col2:
+        st.metric(label="Total de Royalties com desconto", value=f"{totals['Net'].iloc[-1]:,.2f}")
+
+    st.dataframe(totals)
+
+    mode = st.radio('Download', [MERGED, ZIPPED], horizontal=True)
+    fmt = st.selectbox('Formato do download', ['csv'] + columnar.available_formats(), key='batch_format')
+
+    # O download de um lote é montado em segundo plano, arquivo a arquivo
+    download_key = content_key(b'', key, tax_rate, mode, fmt)
+    if st.button('Gerar arquivo processado'):
+        submit_job(
+            f'{distributor}_batch_download', 'Arquivo processado', _build_download,
+            distributor, items, tax_rate, mode, fmt, suffix, key=download_key
+        )
+
+    download = job_status(find_job(f'{distributor}_batch_download', download_key))
+    if download is not None:
+        path, extension = download.result
+        with open(path, 'rb') as data:
+            st.download_button(
+                label="Download arquivo processado",
+                data=data,
+                file_name="processed_statements" + extension,
+                mime="application/zip" if extension == '.zip' else (
+                    "text/csv" if fmt == 'csv' else columnar.mime(fmt)
+                )
+            )
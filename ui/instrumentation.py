@@ -0,0 +1,38 @@
+import streamlit as st
+
+from conversor.instrumentation import StageLog, start_recording
+
+
+def stage_log() -> StageLog:
+    # Um registro por sessão, compartilhado pelas páginas
+    if 'stage_log' not in st.session_state:
+        st.session_state.stage_log = StageLog()
+    return st.session_state.stage_log
+
+
+def record_page(processor: str) -> None:
+    # Etapas do resto da execução da página vão para o registro da sessão
+    start_recording(stage_log(), processor)
+
+
+def instrumentation_panel(log: StageLog) -> None:
+    if not st.sidebar.checkbox('Mostrar instrumentação', key='show_instrumentation'):
+        return
+
+    with st.expander('⏱️ Tempo e memória por etapa', expanded=True):
+        df = log.to_frame()
+        if df.empty:
+            st.caption('Nenhuma etapa registrada ainda.')
+            return
+
+        st.dataframe(df)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button('Exportar JSON', log.to_json(), 'instrumentacao.json', 'application/json')
+        with col2:
+            st.download_button('Exportar CSV', log.to_csv(), 'instrumentacao.csv', 'text/csv')
+        with col3:
+            if st.button('Limpar registro'):
+                log.clear()
+                st.rerun()
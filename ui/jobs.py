@@ -0,0 +1,69 @@
+import time
+from typing import Callable, Dict, Optional
+
+import streamlit as st
+
+from conversor.jobs import FAILED, Job, JobRefs, job_queue
+
+# Intervalo entre as consultas ao andamento dos trabalhos
+POLL_SECONDS = 1.0
+
+
+def _slots() -> Dict[str, str]:
+    # Trabalhos da sessão: nome do espaço na página -> id do trabalho. A fila
+    # não descarta trabalhos referenciados aqui
+    if 'jobs' not in st.session_state:
+        st.session_state.jobs = job_queue.register(JobRefs())
+    return st.session_state.jobs.slots
+
+
+def submit_job(slot: str, name: str, func: Callable, *args, key: Optional[str] = None, **kwargs) -> Job:
+    job = job_queue.submit(name, func, *args, key=key, **kwargs)
+    _slots()[slot] = job.id
+    return job
+
+
+def slot_job(slot: str) -> Optional[Job]:
+    return job_queue.get(_slots().get(slot))
+
+
+def find_job(slot: str, key: str) -> Optional[Job]:
+    # Trabalho com a chave do conteúdo (talvez de outra sessão), guardado no
+    # espaço da página para que continue disponível enquanto a sessão o usa
+    job = job_queue.find(key)
+    if job is not None:
+        _slots()[slot] = job.id
+    return job
+
+
+def keep_job(slot: str, job: Job) -> None:
+    # Mantém o trabalho (e os arquivos dele) enquanto a sessão usa o resultado
+    _slots()[slot] = job.id
+
+
+def job_status(job: Optional[Job]) -> Optional[Job]:
+    # Mostra o andamento; devolve o trabalho só quando ele terminou com sucesso
+    if job is None:
+        return None
+    if job.status == FAILED:
+        # O erro não é reprocessado a cada rerun: só quando o usuário pede
+        st.error(f'Erro em {job.name}: {job.error}')
+        if st.button('Tentar novamente', key=f'retry_{job.id}'):
+            job_queue.forget(job.id)
+            st.rerun()
+        return None
+    if job.finished:
+        return job
+
+    text = f'{job.name}: {job.message or job.status} ({job.elapsed:.0f}s)'
+    st.progress(min(job.progress or 0.0, 1.0), text=text)
+    return None
+
+
+def rerun_while_running() -> None:
+    # Chamado no fim da página: enquanto houver trabalho da sessão em
+    # andamento, espera um pouco e roda a página de novo para atualizar
+    running = [job for job in map(job_queue.get, _slots().values()) if job is not None and not job.finished]
+    if running:
+        time.sleep(POLL_SECONDS)
+        st.rerun()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+
+import streamlit as st
+
+from conversor import columnar
+from conversor.batch import write_statement
+from conversor.cache import content_key
+from conversor.fuga import apply_tax_chunked, iter_taxed_chunks
+from conversor.instrumentation import stage
+from conversor.jobs import track_file
+from conversor.result import PREVIEW_ROWS
+from ui.jobs import find_job, job_status, keep_job, submit_job
+
+
+def _suffix(fmt):
+    return '.csv' if fmt == 'csv' else columnar.extension(fmt)
+
+
+def _build_download(distributor, prepared, processed_path, tax_rate, fmt):
+    # Roda em segundo plano: grava o download em disco, apagado junto com o trabalho
+    fd, path = tempfile.mkstemp(suffix=_suffix(fmt))
+    track_file(path)
+    if processed_path is None:
+        os.close(fd)
+        write_statement(distributor, prepared, tax_rate, path, fmt)
+    elif fmt == 'csv':
+        # Modo streaming (FUGA): aplica o imposto ao arquivo em disco, também em blocos
+        with stage('serialize'), os.fdopen(fd, 'w', encoding='utf-8', newline='') as output:
+            apply_tax_chunked(processed_path, output, tax_rate)
+    else:
+        os.close(fd)
+        columnar.write_columnar_chunks(iter_taxed_chunks(processed_path, tax_rate), path, fmt)
+    return path
+
+
+def prepare_statement(distributor, name, key, func, *args):
+    # Primeira passada, independente da taxa: fica guardada na sessão e
+    # mudar a taxa só recalcula os totais a partir do resumo
+    if st.session_state.get('prepared_key') == key:
+        return st.session_state.prepared
+
+    # Processa em segundo plano: o resultado sobrevive a reruns e à troca de página
+    job = job_status(submit_job(distributor, name, func, *args, key=key))
+    if job is None:
+        return None
+
+    # Os arquivos do trabalho (modo streaming) ficam enquanto a sessão usa o resultado
+    keep_job(f'{distributor}_prepared', job)
+    st.session_state.prepared = job.result
+    st.session_state.prepared_key = key
+    return job.result
+
+
+def statement_section(distributor, prepared, tax_rate, file_name, processed_path=None, currency=''):
+    # Um extrato: totais, resumo por grupo, pré-visualização e download
+    st.info(f'⚠️ Mostrando dados processados com desconto de {tax_rate}%')
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        st.metric(label="Total de Royalties Gross", value=f"{currency}{prepared.total_gross():,.2f}")
+    with col2:
+        st.metric(label="Total de Royalties com desconto", value=f"{currency}{prepared.total_net(tax_rate):,.2f}")
+
+    with st.expander('Totais por grupo'):
+        dimension = st.selectbox('Agrupar por', list(prepared.summary.groups))
+        if dimension:
+            st.dataframe(prepared.summary.table(dimension, tax_rate))
+
+    st.caption(f'Pré-visualização das primeiras {PREVIEW_ROWS} linhas')
+    st.dataframe(prepared.materialize(tax_rate, rows=PREVIEW_ROWS))
+
+    fmt = st.selectbox('Formato do download', ['csv'] + columnar.available_formats())
+
+    # O conjunto completo com desconto só é montado no download, em
+    # segundo plano; o botão de download continua nos reruns seguintes
+    download_key = content_key(b'', st.session_state.prepared_key, tax_rate, fmt)
+    if st.button('Gerar arquivo processado'):
+        submit_job(
+            f'{distributor}_download', 'Arquivo processado', _build_download,
+            distributor, prepared, processed_path, tax_rate, fmt, key=download_key
+        )
+
+    download = job_status(find_job(f'{distributor}_download', download_key))
+    if download is not None:
+        with open(download.result, 'rb') as data:
+            st.download_button(
+                label="Download arquivo processado",
+                data=data,
+                file_name=file_name + _suffix(fmt),
+                mime="text/csv" if fmt == 'csv' else columnar.mime(fmt)
+            )